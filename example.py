@@ -6,6 +6,8 @@ from pygeom.pairs import LineSegment, PointLine, Vertex
 # Set up the field
 f = FiniteField
 f.base = 13
+f.enable_tables()
+f.enable_interning()
 
 geometry = red(f)
 
@@ -3,28 +3,83 @@ This module provides the core objects in the pygeom library, namely Points,
 Lines and Conics
 """
 
-from pygeom.util import check_geometry, all_equal
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import atexit
+from weakref import WeakValueDictionary
+
+from pygeom import predicates
+from pygeom.field import FieldArray
+from pygeom.util import check_geometry, verify, memoized
+
+_INTERNED = WeakValueDictionary()
+# Drop the weak references before interpreter teardown, when their callbacks
+# can no longer run.
+atexit.register(_INTERNED.clear)
+
+# Attributes which cache values derived from the others
+_CACHED = ("_hash", "_canonical")
+
+def _element_type(number):
+    """
+    Return the type of a number, where arrays of field elements (such as
+    FieldArray) count as their element type.
+    """
+    return getattr(number, "element_type", type(number))
 
 class Core(object):
     """
     Base class to provide an interface and perform some common checks on
     the core objects.
+
+    Core objects are immutable: each attribute can only be set once, when the
+    object is created. They are hashed on their class, canonical form and
+    geometry, so can be used in sets and as dictionary keys.
     """
+    def __setattr__(self, name, value):
+        if name in self.__dict__:
+            raise AttributeError, "%s objects are immutable (%s)" % \
+                (self.__class__.__name__, name)
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError, "%s objects are immutable (%s)" % \
+            (self.__class__.__name__, name)
+
     def __init__(self, geometry):
         self.geometry = geometry
-        if geometry is None:
-            geom_form = []
-        else:
-            geom_form = list(geometry.form)
-        form = list(self.form()) + geom_form
-        if not all_equal([type(number) for number in form]):
-            raise TypeError
+        form = self.form()
+        if geometry is not None:
+            form += geometry.form
+        element_type = _element_type(form[0])
+        for number in form:
+            if _element_type(number) != element_type:
+                raise TypeError
 
     def form(self):
         """
         Return a tuple representation of the object.
         """
         raise NotImplementedError
+
+    def canonical_form(self):
+        """
+        Return the tuple representation of the object which is used for
+        hashing. Equal objects in the same geometry have equal canonical forms.
+        """
+        return self.form()
+
+    def intern(self):
+        """
+        Return the shared object equal to this one, making this object the
+        shared one if there isn't one already. Objects which are interned can
+        then be compared by identity.
+        """
+        key = self.__class__, self.canonical_form(), self.geometry
+        return _INTERNED.setdefault(key, self)
         
     def eval(self, x, y):
         """
@@ -32,11 +87,39 @@ class Core(object):
         """
         raise NotImplementedError
 
+    def eval_grid(self, field):
+        """
+        Evaluate the object at every point of the plane over the given finite
+        field in one vectorised pass. Returns a FieldArray indexed as [x, y].
+        """
+        x, y = np.indices((field.base, field.base))
+        return self.eval(FieldArray(x, field.base), FieldArray(y, field.base))
+
+    def incidence_mask(self, field):
+        """
+        Return a boolean array, indexed as [x, y], which is True at the points
+        of the plane over the given finite field which "match this object".
+        """
+        xs, ys = self.incidence_points(field)
+        mask = np.zeros((field.base, field.base), dtype=bool)
+        mask[xs, ys] = True
+        return mask
+
+    def incidence_points(self, field):
+        """
+        Return the points of the plane over the given finite field which
+        "match this object", as a pair of integer arrays (xs, ys) sorted by x
+        and then y.
+        """
+        return np.nonzero(self.eval_grid(field) == 0)
+
     def __eq__(self, other):
         """
         For two objects to be equal they must have the same form
         and also reside in the same geometry.
         """
+        if other is self:
+            return True
         return bool(self.__class__ == other.__class__ and
                     self.form() == other.form() and
                     self.geometry == other.geometry)
@@ -44,6 +127,25 @@ class Core(object):
     def __ne__(self, other):
         return not self == other
 
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash((self.__class__, self.canonical_form(),
+                               self.geometry))
+            return self._hash
+
+    def __getstate__(self):
+        """
+        Return the attributes to pickle or copy, leaving out cached values.
+        The hashes of classes and geometries differ between processes, so the
+        hash is recomputed rather than restored.
+        """
+        state = self.__dict__.copy()
+        for name in _CACHED:
+            state.pop(name, None)
+        return state
+
 class Point(Core):
     """
     A point is defined as pair of values, [x, y] taken from a particular field.
@@ -81,6 +183,22 @@ class Point(Core):
         else:
             return 1
 
+    def eval_grid(self, field):
+        """
+        Evaluate the point at every point of the plane over the given finite
+        field, giving 0 at this point and 1 everywhere else.
+        """
+        grid = np.ones((field.base, field.base), dtype=np.int64)
+        grid[self.incidence_points(field)] = 0
+        return FieldArray(grid, field.base)
+
+    def incidence_points(self, field):
+        """
+        Return this point as a pair of integer arrays (xs, ys).
+        """
+        return (np.array([FieldArray(self.x, field.base).value]),
+                np.array([FieldArray(self.y, field.base).value]))
+
     def __repr__(self):
         return "[%s, %s]" % (str(self.x), str(self.y))
 
@@ -130,20 +248,33 @@ class Point(Core):
         """
         return self.geometry.norm(self)
 
+    def projective(self):
+        """
+        Return this point in homogeneous coordinates, as a ProjectivePoint.
+        """
+        from pygeom.projective import ProjectivePoint
+        return ProjectivePoint.from_affine(self)
+
     def circle(self, quadrance):
         """
         Create a circle with a given quadrance centred at this point.
         """
-        x, y = self.form()
         a, b, c = self.geometry.form
-        return Conic(a, 2*b, c, -2*(a*x + b*y), -2*(b*x + c*y), 
-                     self.norm() - quadrance, self.geometry)
+        mx, my = self.geometry.apply(self.x, self.y)
+        return Conic(a, 2*b, c, -2*mx, -2*my,
+                     self.x*mx + self.y*my - quadrance, self.geometry)
 
 
 class Line(Core):
+    """
+    A line a*x + b*y + c = 0.
+
+    The coefficients are stored as given. Multiples of them describe the same
+    line, so they are only reduced to a canonical form, which is cached, when
+    the line is compared, hashed or printed.
+    """
 
     def __init__(self, a, b, c, geometry=None):
-        a, b, c = a.reduce([b, c])
         self.a = a
         self.b = b
         self.c = c
@@ -155,6 +286,24 @@ class Line(Core):
         """
         return self.a, self.b, self.c
 
+    def canonical_form(self):
+        """
+        Return the coefficients reduced so that all common factors are
+        removed.
+        """
+        try:
+            return self._canonical
+        except AttributeError:
+            self._canonical = tuple(self.a.reduce([self.b, self.c]))
+            return self._canonical
+
+    def __eq__(self, other):
+        if other is self:
+            return True
+        return bool(self.__class__ == other.__class__ and
+                    self.canonical_form() == other.canonical_form() and
+                    self.geometry == other.geometry)
+
     def eval(self, x, y):
         """
         Evaluate whether the given x, y coordinates "match this object".
@@ -163,9 +312,35 @@ class Line(Core):
         """
         return self.a*x + self.b*y + self.c
 
+    def incidence_points(self, field):
+        """
+        Return the points of the plane over the given finite field which lie
+        on the line, as a pair of integer arrays (xs, ys) sorted by x and then
+        y. The line is solved for y in each column, taking O(p) time.
+        """
+        base = field.base
+        a, b, c = self.form()
+        xs = FieldArray(np.arange(base), base)
+        if b != 0:
+            return xs.value, (-(a*xs + c)/b).value
+        elif a != 0:
+            return (np.full(base, (-c/a).value, dtype=np.int64),
+                    np.arange(base))
+        elif c == 0:
+            return np.nonzero(np.ones((base, base), dtype=bool))
+        else:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+
     def __repr__(self):
-        return "<%s:%s:%s>" % (str(self.a), str(self.b), str(self.c))
+        return "<%s:%s:%s>" % tuple([str(x) for x in self.canonical_form()])
+
 
+    def projective(self):
+        """
+        Return this line in homogeneous coordinates, as a ProjectiveLine.
+        """
+        from pygeom.projective import ProjectiveLine
+        return ProjectiveLine.from_affine(self)
 
     def vector(self):
         """
@@ -213,12 +388,52 @@ class Conic(Core):
         a, b, c, d, e, f = self.form()
         return a*x*x + b*x*y + c*y*y + d*x + e*y + f
 
+    def incidence_points(self, field):
+        """
+        Return the points of the plane over the given finite field which lie
+        on the conic, as a pair of integer arrays (xs, ys) sorted by x and
+        then y.
+
+        For each x the conic is a quadratic (or linear) equation in y, and all
+        of these are solved together, so this takes O(p) time rather than
+        testing all p^2 points.
+        """
+        base = field.base
+        if base == 2:
+            return Core.incidence_points(self, field)
+
+        a, b, c, d, e, f = self.form()
+        xs = FieldArray(np.arange(base), base)
+
+        # Solve alpha*y^2 + beta*y + gamma = 0 in each column.
+        beta = b*xs + e
+        gamma = a*xs*xs + d*xs + f
+        if c != 0:
+            det = beta*beta - 4*c*gamma
+            roots = det.is_square()
+            double = roots & (det == 0)
+            sqrt_det = det[roots].sqrt()
+            y1 = (-beta[roots] + sqrt_det)/(2*c)
+            y2 = (-beta[roots] - sqrt_det)/(2*c)
+            single = ~double[roots]
+            xs = np.concatenate([xs.value[roots], xs.value[roots][single]])
+            ys = np.concatenate([y1.value, y2.value[single]])
+        else:
+            linear = beta != 0
+            whole = ~linear & (gamma == 0)
+            ys = (-gamma[linear]/beta[linear]).value
+            xs = np.concatenate([xs.value[linear],
+                                 np.repeat(xs.value[whole], base)])
+            ys = np.concatenate([ys, np.tile(np.arange(base), whole.sum())])
+
+        order = np.lexsort((ys, xs))
+        return xs[order], ys[order]
+
     def through(self, point):
         """
         Check whether the conic passes through the point.
         """
-        x, y = point.form()
-        return self.eval(x, y) == 0
+        return predicates.through(self, point)
 
     def det(self):
         """
@@ -232,7 +447,8 @@ class Conic(Core):
         y = (-e + (e*e - 4*c*f).sqrt())/(2*c)
         x = y - y
         point = Point(x, y, self.geometry)
-        assert self.through(point)
+        verify(lambda: self.through(point),
+               "Conic._point_on() failed its self-check")
         return point
 
     def is_parabola(self):
@@ -253,6 +469,7 @@ class Conic(Core):
                 a1*c == c1*a and
                 b1*c == c1*2*b)
 
+    @memoized("Conic.centre_quadrance")
     @check_geometry
     def centre_quadrance(self):
         """
@@ -260,11 +477,11 @@ class Conic(Core):
         quadrance of the circle.
         """
         # return a point and a quadrance        
-        a, b, c = self.geometry.form
+        ia, ib, ic = self.geometry.inverse
         d1, e1 = self.d, self.e
 
-        x0 = -(c*d1 - b*e1)/(2*self.geometry.det())
-        y0 = -(-b*d1 + a*e1)/(2*self.geometry.det())
+        x0 = -(ia*d1 + ib*e1)/2
+        y0 = -(ib*d1 + ic*e1)/2
 
         centre = Point(x0, y0, self.geometry)
 
@@ -272,6 +489,7 @@ class Conic(Core):
 
         return centre, K
 
+    @memoized("Conic.focus_directrix")
     @check_geometry
     def focus_directrix(self):
         """
@@ -281,13 +499,15 @@ class Conic(Core):
         #pylint: disable-msg=R0914
         from pygeom.pairs import PointLine
         a, b, c = self.geometry.form
+        det = self.geometry.determinant
+        ia, ib, ic = self.geometry.inverse
         D, E, F = self.d, self.e, self.f
         a1 = a - self.a
         b1 = b - self.b/2
         
-        AA = 4*(a*b1*b1 - 2*b*a1*b1 + c*a1*a1 - a1*self.geometry.det())
+        AA = 4*(a*b1*b1 - 2*b*a1*b1 + c*a1*a1 - a1*det)
         BB = 4*a1*((a*E - b*D)*b1 + (- b*E + c*D)*a1)
-        CC = a1*a1*(a*E*E - 2*b*E*D + c*D*D - 4*self.geometry.det()*F)
+        CC = a1*a1*(a*E*E - 2*b*E*D + c*D*D - 4*det*F)
 
         c11 = (-BB + (BB*BB - 4*AA*CC).sqrt())/(2*AA)
         c12 = (-BB - (BB*BB - 4*AA*CC).sqrt())/(2*AA)
@@ -295,13 +515,13 @@ class Conic(Core):
         direc1, direc2 = (Line(a1, b1, c11, self.geometry),
                           Line(a1, b1, c12, self.geometry))
 
-        K = (a*b1*b1 - 2*b*a1*b1 + c*a1*a1)/(a1*self.geometry.det())
+        K = (a*b1*b1 - 2*b*a1*b1 + c*a1*a1)/(a1*det)
 
-        x1 = -(c*(2*c11 + D) - b*(2*c11*b1/a1 + E))/(2*self.geometry.det())
-        y1 = -(-b*(2*c11 + D) + a*(2*c11*b1/a1 + E))/(2*self.geometry.det())
+        x1 = -(ia*(2*c11 + D) + ib*(2*c11*b1/a1 + E))/2
+        y1 = -(ib*(2*c11 + D) + ic*(2*c11*b1/a1 + E))/2
 
-        x2 = -(c*(2*c12 + D) - b*(2*c12*b1/a1 + E))/(2*self.geometry.det())
-        y2 = -(-b*(2*c12 + D) + a*(2*c12*b1/a1 + E))/(2*self.geometry.det())
+        x2 = -(ia*(2*c12 + D) + ib*(2*c12*b1/a1 + E))/2
+        y2 = -(ib*(2*c12 + D) + ic*(2*c12*b1/a1 + E))/2
 
         focus1 = Point(x1, y1, self.geometry)
         focus2 = Point(x2, y2, self.geometry)
@@ -320,12 +540,12 @@ class Conic(Core):
         """
 
         A, B, C, D, E, F = self.form()
-        a1, b1, _ = line.form()
+        # The construction below assumes the reduced coefficients of the line
+        a1, b1, c0 = line.canonical_form()
         a, b, c = self.geometry.form
 
         alpha = (A*c - B*b + C*a)
-        d1 = line.vector().norm()
-        assert d1 == a*b1*b1 - 2*b*a1*b1 + c*a1*a1
+        d1 = a*b1*b1 - 2*b*a1*b1 + c*a1*a1
 
         a2  = ((2*A*d1 - a1*a1*alpha)/(2*d1*d1)).sqrt()
         b22 = ((2*C*d1 - b1*b1*alpha)/(2*d1*d1)).sqrt()
@@ -334,19 +554,19 @@ class Conic(Core):
         else:
             b2 = ((  B*d1 - a1*b1*alpha)/(2*d1*d1))/a2
             print b2, b22, -b22
-    
-        x = 2*A*d1 - alpha*a1*a1
-        y =   B*d1 - alpha*a1*b1
-        z = 2*C*d1 - alpha*b1*b1
-        assert x*z == y*y
 
         d2 = a*b2*b2 - 2*b*a2*b2 + c*a2*a2
-        assert a1*b2 - a2*b1 != 0
 
         c1 = ( b2*D - a2*E)/(2*d2*(a1*b2 - a2*b1))
         c2 = (-b1*D + a1*E)/(2*d1*(a1*b2 - a2*b1))
 
-        assert c1 == line.c
+        def check():
+            x = 2*A*d1 - alpha*a1*a1
+            y =   B*d1 - alpha*a1*b1
+            z = 2*C*d1 - alpha*b1*b1
+            return (x*z == y*y and
+                    c1 == c0)
+        verify(check, "Conic.co_diagonal() failed its self-check")
 
         K = (a*c - b*b)*(c1*c1/d1 + c2*c2/d2  - F/(d1*d2))
         
@@ -368,11 +588,7 @@ class Conic(Core):
         Check if the given line is tangent to this conic.
         """
         # (Bc + Db + Ea)^2 -4(ACc^2 + AFb^2 + CFa^2) + 4((AE - BD)bc + (CD - BE)ac  + (BF- DE)ab) = 0
-
-        A, B, C, D, E, F = self.form()
-        a, b, c = line.form()
-
-        return (B*c + D*b + E*a)*(B*c + D*b + E*a) - 4*(A*C*c*c + A*F*b*b + C*F*a*a) + 4*((A*E - B*D)*b*c + (C*D - B*E)*a*c + (B*F - D*E)*a*b ) == 0
+        return predicates.tangent(self, line)
 
 
     def pole(self, polar):
@@ -409,3 +625,205 @@ class Conic(Core):
 
         c1 = d*x + e*y + 2*f
         return Line(a1, b1, c1, self.geometry)
+
+
+class PointSet(Core):
+    """
+    A collection of points in one geometry, stored as two FieldArrays of
+    coordinates rather than as individual Point objects.
+
+    The metric and incidence methods act on every point at once, and a Point
+    is only created when a single element of the set is indexed.
+    """
+
+    def __init__(self, xs, ys, geometry=None):
+        """
+        Create a set of points from sequences (or FieldArrays) of x and y
+        coordinates.
+        """
+        if not isinstance(xs, FieldArray):
+            xs = FieldArray(xs)
+        if not isinstance(ys, FieldArray):
+            ys = FieldArray(ys, xs._base)
+        self.x = xs
+        self.y = ys
+        Core.__init__(self, geometry)
+
+    @classmethod
+    def from_points(cls, points):
+        """
+        Create a set from a list of Points, which must share a geometry.
+        """
+        return cls([point.x for point in points], [point.y for point in points],
+                   points[0].geometry)
+
+    def form(self):
+        """
+        Return a tuple representation of the object.
+        """
+        return self.x, self.y
+
+    def __repr__(self):
+        return "{%s}" % ", ".join([repr(point) for point in self])
+
+    def __len__(self):
+        return len(self.x)
+
+    def __getitem__(self, index):
+        """
+        Return the Point at an integer index, or a new PointSet for a slice
+        or mask.
+        """
+        x, y = self.x[index], self.y[index]
+        if isinstance(x, FieldArray):
+            return PointSet(x, y, self.geometry)
+        return Point(x, y, self.geometry)
+
+    __hash__ = None
+
+    def __eq__(self, other):
+        return bool(self.__class__ == other.__class__ and
+                    len(self) == len(other) and
+                    (self.x == other.x).all() and (self.y == other.y).all() and
+                    self.geometry == other.geometry)
+
+    def __sub__(self, other):
+        """
+        Vector substraction of a Point or an equally sized PointSet.
+        """
+        return PointSet(self.x - other.x, self.y - other.y, self.geometry)
+
+    def __add__(self, other):
+        """
+        Vector addition of a Point or an equally sized PointSet.
+        """
+        return PointSet(self.x + other.x, self.y + other.y, self.geometry)
+
+    def __mul__(self, other):
+        """
+        Scalar multiplcation.
+        """
+        return PointSet(self.x * other, self.y * other, self.geometry)
+
+    def __rmul__(self, other):
+        """
+        Scalar multiplcation.
+        """
+        return self * other
+
+    @check_geometry
+    def null(self):
+        """
+        Return a boolean array which is True for the null points of the set.
+        """
+        return self.norm() == 0
+
+    @check_geometry
+    def norm(self):
+        """
+        The norms of the vectors from the origin to each point, as a
+        FieldArray.
+        """
+        return self.geometry.norm(self)
+
+    @check_geometry
+    def dot(self, other):
+        """
+        The dot products of each point with a Point, or with the
+        corresponding point of an equally sized PointSet.
+        """
+        return self.geometry.dot(self, other)
+
+    def on(self, line):
+        """
+        Return a boolean array which is True for the points of the set which
+        lie on the given line.
+        """
+        return predicates.on(self, line)
+
+
+class LineSet(Core):
+    """
+    A collection of lines in one geometry, stored as three FieldArrays of
+    coefficients rather than as individual Line objects.
+
+    The coefficients of every line are reduced together, and a Line is only
+    created when a single element of the set is indexed.
+    """
+
+    def __init__(self, a, b, c, geometry=None):
+        """
+        Create a set of lines from sequences (or FieldArrays) of coefficients.
+        """
+        if not isinstance(a, FieldArray):
+            a = FieldArray(a)
+        a, b, c = a.reduce([FieldArray(b, a._base), FieldArray(c, a._base)])
+        self.a = a
+        self.b = b
+        self.c = c
+        Core.__init__(self, geometry)
+
+    @classmethod
+    def from_lines(cls, lines):
+        """
+        Create a set from a list of Lines, which must share a geometry.
+        """
+        return cls([line.a for line in lines], [line.b for line in lines],
+                   [line.c for line in lines], lines[0].geometry)
+
+    def form(self):
+        """
+        Return a tuple representation of the object.
+        """
+        return self.a, self.b, self.c
+
+    def __repr__(self):
+        return "{%s}" % ", ".join([repr(line) for line in self])
+
+    def __len__(self):
+        return len(self.a)
+
+    def __getitem__(self, index):
+        """
+        Return the Line at an integer index, or a new LineSet for a slice or
+        mask.
+        """
+        a, b, c = self.a[index], self.b[index], self.c[index]
+        if isinstance(a, FieldArray):
+            return LineSet(a, b, c, self.geometry)
+        return Line(a, b, c, self.geometry)
+
+    __hash__ = None
+
+    def __eq__(self, other):
+        return bool(self.__class__ == other.__class__ and
+                    len(self) == len(other) and
+                    (self.a == other.a).all() and (self.b == other.b).all() and
+                    (self.c == other.c).all() and
+                    self.geometry == other.geometry)
+
+    def eval(self, x, y):
+        """
+        Evaluate every line at the given x, y coordinates.
+        """
+        return self.a*x + self.b*y + self.c
+
+    def vector(self):
+        """
+        Return a PointSet of vectors parallel to each line.
+        """
+        return PointSet(-self.b, self.a, self.geometry)
+
+    @check_geometry
+    def null(self):
+        """
+        Return a boolean array which is True for the null lines of the set.
+        """
+        return self.vector().null()
+
+    def through(self, point):
+        """
+        Return a boolean array which is True for the lines of the set which
+        pass through the given point.
+        """
+        return predicates.on(point, self)
@@ -9,8 +9,20 @@ this is very core of the package.
 """
 
 import random
+from fractions import Fraction
 
-from pygeom.util import inverse, gcd, isqrt, is_square, shanks_tonelli
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+from pygeom.util import inverse, gcd, exact_sqrt, is_square, shanks_tonelli, \
+    primitive_root, is_quadratic_residue, _shanks_tonelli_params, verify
 
 class Field(object):
     """
@@ -20,6 +32,8 @@ class Field(object):
     to be used by pygeom.
     """
 
+    __slots__ = ()
+
     def __init__(self, value, *args, **kwargs):
         pass
 
@@ -87,27 +101,156 @@ class Field(object):
     def random(cls):
         raise NotImplementedError    
 
+class FieldTables(object):
+    """
+    Precomputed lookup tables for arithmetic modulo a prime.
+
+    Building the tables costs O(p) time and memory, after which inverses,
+    squares, square roots and discrete logarithms are single list lookups.
+    They are intended for the small primes used when exploring finite
+    geometries, and are enabled per prime with FiniteField.enable_tables().
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.generator = primitive_root(base)
+
+        # exp[i] = g^i and log[g^i] = i, for the generator g.
+        self.exp = [1]*(base - 1)
+        self.log = [None]*base
+        x = 1
+        for i in range(base - 1):
+            self.exp[i] = x
+            self.log[x] = i
+            x = x*self.generator % base
+
+        self.inverse = [None] + [self.exp[-self.log[x] % (base - 1)]
+                                 for x in range(1, base)]
+        self.square = [x*x % base for x in range(base)]
+
+        # Map each quadratic residue to its smallest root, leaving None for
+        # the non-residues.
+        self.sqrt = [None]*base
+        for x in range(base):
+            if self.sqrt[self.square[x]] is None:
+                self.sqrt[self.square[x]] = x
+
+    def mul(self, a, b):
+        """
+        Multiply two residues using the log/antilog tables.
+        """
+        if a == 0 or b == 0:
+            return 0
+        return self.exp[(self.log[a] + self.log[b]) % (self.base - 1)]
+
+    def div(self, a, b):
+        """
+        Divide two residues using the inverse table.
+        """
+        if b == 0:
+            raise ZeroDivisionError
+        return a*self.inverse[b] % self.base
+
+_TABLES = {}
+
+_ELEMENTS = {}
+
 class FiniteField(Field):
 
     base = 3
 
-    def __init__(self, value, base=None):
-        Field.__init__(self, value)
+    __slots__ = ('value', '_base')
 
+    @classmethod
+    def enable_tables(cls, base=None):
+        """
+        Precompute the lookup tables for the given prime (the current base
+        if not specified), so that division, is_square() and sqrt() on
+        elements of that field become table lookups.
+        """
+        if base is None:
+            base = cls.base
+        if base not in _TABLES:
+            _TABLES[base] = FieldTables(base)
+        return _TABLES[base]
+
+    @classmethod
+    def disable_tables(cls, base=None):
+        """
+        Discard the lookup tables for the given prime (the current base if
+        not specified).
+        """
+        if base is None:
+            base = cls.base
+        _TABLES.pop(base, None)
+
+    @classmethod
+    def enable_interning(cls, base=None):
+        """
+        Preallocate one element for each value of the given prime (the
+        current base if not specified). From then on, construction and
+        arithmetic in that field return these shared elements rather than
+        allocating new ones.
+        """
+        if base is None:
+            base = cls.base
+        if base not in _ELEMENTS:
+            elements = []
+            for value in range(base):
+                element = Field.__new__(cls)
+                element.value = value
+                element._base = base
+                elements.append(element)
+            _ELEMENTS[base] = elements
+
+    @classmethod
+    def disable_interning(cls, base=None):
+        """
+        Stop sharing elements for the given prime (the current base if not
+        specified).
+        """
+        if base is None:
+            base = cls.base
+        _ELEMENTS.pop(base, None)
+
+    def __new__(cls, value, base=None):
         # We're actually pedantic about types here.
         if type(value) not in [int, long]:
             raise TypeError
         if base is None:
-            self._base = self.base
+            base = cls.base
         elif type(base) not in [int, long]:
             raise TypeError, "base must be a prime number (%s)" % str(base)
         elif base <= 1:
             raise ValueError, "base must be a prime number (%s)" % str(base)
-        else:
-            self._base = base
 
+        elements = _ELEMENTS.get(base)
+        if elements is not None:
+            return elements[value % base]
+
+        self = Field.__new__(cls)
         # Convert to a value between [0, base-1]
-        self.value = value % self._base
+        self.value = value % base
+        self._base = base
+        return self
+
+    def __reduce__(self):
+        # Go back through the constructor, so that unpickled and copied
+        # elements are the shared ones when they are interned.
+        return self.__class__, (self.value, self._base)
+
+    def _new(self, value):
+        """
+        Return the element of this field congruent to the integer value,
+        skipping the argument checks performed by the constructor.
+        """
+        elements = _ELEMENTS.get(self._base)
+        if elements is not None:
+            return elements[value % self._base]
+        element = Field.__new__(self.__class__)
+        element.value = value % self._base
+        element._base = self._base
+        return element
 
     def __repr__(self):
         return "%d (%d)" % (self.value, self._base)
@@ -117,17 +260,29 @@ class FiniteField(Field):
         Perform an operator on this and another object.
         """
         if other.__class__ == self.__class__:
-            return self.__class__(op(other.value), self._base)
+            return self._new(op(other.value))
         elif type(other) in [int, long]:
-            return self.__class__(op(other), self._base)
+            return self._new(op(other))
         else:
             raise TypeError
 
     def __add__(self, other):
-        return self._op(self.value.__add__, other)
+        try:
+            return self._op(self.value.__add__, other)
+        except TypeError:
+            try:
+                return other.__radd__(self)
+            except:
+                raise TypeError
 
     def __sub__(self, other):
-        return self._op(self.value.__sub__, other)
+        try:
+            return self._op(self.value.__sub__, other)
+        except TypeError:
+            try:
+                return other.__rsub__(self)
+            except:
+                raise TypeError
 
     def __mul__(self, other):
         try:
@@ -139,15 +294,30 @@ class FiniteField(Field):
                 raise TypeError
 
     def __neg__(self):
-        return self.__class__(0, self._base) - self
+        return self._new(-self.value)
+
+    def _inverse(self, value):
+        """
+        Return the inverse of an integer modulo the base of this field.
+        """
+        tables = _TABLES.get(self._base)
+        if tables is None:
+            return inverse(value, self._base)
+        value = tables.inverse[value % self._base]
+        if value is None:
+            raise ZeroDivisionError
+        return value
 
     def __div__(self, other):
         if other.__class__ == self.__class__:
-            return self * inverse(other.value, self._base)
+            return self * self._inverse(other.value)
         elif type(other) in [int, long]:
-            return self * inverse(other, self._base)
+            return self * self._inverse(other)
         else:
-            raise TypeError
+            try:
+                return other.__rdiv__(self)
+            except:
+                raise TypeError
 
     def __radd__(self, other):
         return self._op(self.value.__add__, other)
@@ -159,32 +329,38 @@ class FiniteField(Field):
         return self._op(self.value.__mul__, other)
 
     def __rdiv__(self, other):
-        return self.__class__(other * inverse(self.value, self._base),
-                              self._base)
+        return self.__class__(other * self._inverse(self.value), self._base)
 
     def __eq__(self, other):
+        if other is self:
+            return True
         if type(other) in [int, long]:
-            other = self.__class__(other, self._base)
+            return (other - self.value) % self._base == 0
 
         if other.__class__ == self.__class__:
             return self.value == other.value and self._base == other._base
         else:
             raise TypeError, "Equality not defined for (%s)" % str(other)
 
+    def __hash__(self):
+        # Elements compare equal to ints, so hash as the int of their value
+        return hash(self.value)
+
     def is_square(self):
         """
         Boolean function to check if the number is a square in the field.
 
         E.g. for a given x \in F, does there exist an a \in F such that a*a = x.
 
-        If x is a square then x^(p - 1)/2 = 1 (mod p).
+        If x is a square then x^(p - 1)/2 = 1 (mod p), which is checked
+        with a cached bitmap for small primes and the Jacobi symbol otherwise.
 
         :rtype: Boolean
-        """        
-        result = 1
-        for _ in range((self._base - 1)/2):
-            result *= self.value
-        return result % self._base == 1 or self.value == 0
+        """
+        tables = _TABLES.get(self._base)
+        if tables is not None:
+            return tables.sqrt[self.value] is not None
+        return is_quadratic_residue(self.value, self._base)
 
     def sqrt(self):
         """
@@ -194,10 +370,18 @@ class FiniteField(Field):
 
         If no such a exists, raises ValueError.
         """
+        tables = _TABLES.get(self._base)
+        if tables is not None:
+            root = tables.sqrt[self.value]
+            if root is None:
+                raise ValueError, \
+                    "This number is not a square! (%s)" % str(self)
+            return self._new(root)
+
         if not self.is_square():
             raise ValueError, "This number is not a square! (%s)" % str(self)
-        a = self.__class__(shanks_tonelli(self.value, self._base))
-        assert a*a == self
+        a = self._new(shanks_tonelli(self.value, self._base))
+        verify(lambda: a*a == self, "FiniteField.sqrt() failed its self-check")
         return a
 
     def reduce(self, others):
@@ -220,11 +404,330 @@ class FiniteField(Field):
         """
         return cls(random.randint(0, cls.base - 1))
 
+def _pow_mod(values, e, p):
+    """
+    Raise each element of an int64 array of residues to the power e mod p.
+    """
+    result = np.ones_like(values)
+    values = values % p
+    while e:
+        if e & 1:
+            result = result*values % p
+        values = values*values % p
+        e >>= 1
+    return result
+
+def _batch_inverse(values, p):
+    """
+    Invert a 1-d int64 array of non-zero residues mod p using Montgomery's
+    trick. The pairwise products are built up level by level into a tree,
+    the single product at the root is inverted, and that inverse is pushed
+    back down the tree. This costs one modular inverse plus O(n) vectorised
+    multiplications.
+    """
+    if len(values) == 0:
+        return values.copy()
+
+    levels = []
+    level = values
+    while len(level) > 1:
+        if len(level) % 2:
+            level = np.append(level, 1)
+        levels.append(level)
+        level = level[0::2]*level[1::2] % p
+
+    inv = np.array([inverse(int(level[0]), p) % p], dtype=np.int64)
+    for level in reversed(levels):
+        # inv[i] is the inverse of level[2*i]*level[2*i + 1]
+        inv = inv[:len(level)/2]
+        down = np.empty(len(level), dtype=np.int64)
+        down[0::2] = inv*level[1::2] % p
+        down[1::2] = inv*level[0::2] % p
+        inv = down
+    return inv[:len(values)]
+
+def _batch_sqrt(values, p):
+    """
+    Calculate square roots of a 1-d int64 array of quadratic residues mod the
+    odd prime p, by running the Shanks-Tonelli algorithm on every element at
+    once.
+    """
+    # pylint: disable-msg=C0103
+    Q, S, _, V = _shanks_tonelli_params(p)
+
+    zero = values == 0
+    values = np.where(zero, 1, values)
+
+    R = _pow_mod(values, (Q + 1)/2, p)
+    t = _pow_mod(values, Q, p)
+    c = np.full(len(values), V, dtype=np.int64)
+    M = np.full(len(values), S, dtype=np.int64)
+
+    active = t != 1
+    while active.any():
+        # Find the smallest i such that t^(2^i) = 1 (mod p) for each element
+        i = np.zeros(len(values), dtype=np.int64)
+        found = ~active
+        tt = t
+        for k in range(1, S + 1):
+            tt = tt*tt % p
+            i[~found & (tt == 1)] = k
+            found |= tt == 1
+            if found.all():
+                break
+
+        # b = c^(2^(M - i - 1)) for the elements which are still active
+        steps = np.where(active, M - i - 1, 0)
+        b = c.copy()
+        for k in range(steps.max()):
+            b = np.where(steps > k, b*b % p, b)
+
+        R = np.where(active, R*b % p, R)
+        c = np.where(active, b*b % p, c)
+        t = np.where(active, t*c % p, t)
+        M = np.where(active, i, M)
+        active = t != 1
+
+    return np.where(zero, 0, R)
+
+class FieldArray(Field):
+    """
+    An array of elements of a finite field, stored as an int64 NumPy array.
+
+    FieldArray implements the Field interface elementwise, so Points, Lines
+    and Conics whose coordinates are FieldArrays describe a whole collection
+    of objects at once. Comparisons and is_square() return boolean NumPy
+    arrays rather than a single Boolean.
+
+    Products are formed in int64 before being reduced, so the base must be
+    less than 2^31.
+    """
+
+    base = 3
+
+    element_type = FiniteField
+
+    __slots__ = ('value', '_base')
+
+    __hash__ = None
+
+    def __init__(self, values, base=None):
+        Field.__init__(self, values)
+        if np is None:
+            raise ImportError, "FieldArray requires numpy"
+
+        # Field elements carry their own base, which is used unless another
+        # is given.
+        if isinstance(values, (list, tuple)) and values and \
+                isinstance(values[0], FiniteField):
+            if base is None:
+                base = values[0]._base
+            values = [getattr(value, "value", value) for value in values]
+        elif isinstance(values, (FieldArray, FiniteField)):
+            if base is None:
+                base = values._base
+            values = values.value
+
+        if base is None:
+            base = self.base
+        elif type(base) not in [int, long]:
+            raise TypeError, "base must be a prime number (%s)" % str(base)
+        if base <= 1 or base >= 2**31:
+            raise ValueError, \
+                "base must be a prime number less than 2^31 (%s)" % str(base)
+        self._base = base
+
+        values = np.asarray(values)
+        if values.dtype.kind not in "iu":
+            raise TypeError, "FieldArray values must be integers"
+
+        # Convert to values between [0, base-1]
+        self.value = values.astype(np.int64) % base
+
+    def __repr__(self):
+        return "%s (%d)" % (str(self.value), self._base)
+
+    def __len__(self):
+        return len(self.value)
+
+    def __getitem__(self, index):
+        value = self.value[index]
+        if np.ndim(value) == 0:
+            return FiniteField(int(value), self._base)
+        return self._new(value)
+
+    @property
+    def shape(self):
+        """
+        The shape of the underlying array.
+        """
+        return self.value.shape
+
+    def _new(self, values):
+        """
+        Return a new array in this field from an int64 array of residues,
+        skipping the argument checks performed by the constructor.
+        """
+        array = Field.__new__(self.__class__)
+        array.value = values
+        array._base = self._base
+        return array
+
+    def _values(self, other):
+        """
+        Return the residues of another field object or integer, as either an
+        int64 array or an int.
+        """
+        if other.__class__ == self.__class__ or \
+                other.__class__ == self.element_type:
+            if other._base != self._base:
+                raise TypeError, "Fields differ (%s)" % str(other)
+            return other.value
+        elif type(other) in [int, long]:
+            return other % self._base
+        else:
+            raise TypeError
+
+    def __add__(self, other):
+        return self._new((self.value + self._values(other)) % self._base)
+
+    def __sub__(self, other):
+        return self._new((self.value - self._values(other)) % self._base)
+
+    def __mul__(self, other):
+        return self._new(self.value*self._values(other) % self._base)
+
+    def __neg__(self):
+        return self._new(-self.value % self._base)
+
+    def __div__(self, other):
+        values = self._values(other)
+        if np.ndim(values) == 0:
+            values = inverse(values, self._base) % self._base
+        else:
+            values = self._new(values).inverse().value
+        return self._new(self.value*values % self._base)
+
+    def __radd__(self, other):
+        return self + other
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __rmul__(self, other):
+        return self * other
+
+    def __rdiv__(self, other):
+        return self.inverse() * other
+
+    def __eq__(self, other):
+        try:
+            return self.value == self._values(other)
+        except TypeError:
+            raise TypeError, "Equality not defined for (%s)" % str(other)
+
+    def __ne__(self, other):
+        return ~(self == other)
+
+    def inverse(self):
+        """
+        The elementwise multiplicative inverses of the array.
+
+        All of the inverses are found together with a single modular inverse
+        (Montgomery's trick). Raises ZeroDivisionError if any element is zero.
+        """
+        values = self.value.ravel()
+        if (values == 0).any():
+            raise ZeroDivisionError
+        return self._new(_batch_inverse(values, self._base).reshape(
+                self.value.shape))
+
+    def is_square(self):
+        """
+        Elementwise check of whether each number is a square in the field,
+        using Euler's criterion.
+
+        :rtype: Boolean array
+        """
+        if self._base == 2:
+            return np.ones(self.value.shape, dtype=bool)
+        return _pow_mod(self.value, (self._base - 1)/2, self._base) != \
+            self._base - 1
+
+    def sqrt(self):
+        """
+        The elementwise square roots of the array.
+
+        If any element is not a square, raises ValueError.
+        """
+        if not self.is_square().all():
+            raise ValueError, "Not all of the numbers are squares! (%s)" % \
+                str(self)
+        if self._base == 2:
+            return self._new(self.value.copy())
+        return self._new(_batch_sqrt(self.value.ravel(), self._base).reshape(
+                self.value.shape))
+
+    def reduce(self, others):
+        """
+        Reduce this array, along with a list of others, elementwise so that
+        all common factors are removed. At each position every number is
+        divided by the first of them which is non-zero.
+        """
+        values = np.broadcast_arrays(self.value,
+                                     *[np.asarray(self._values(other))
+                                       for other in others])
+        pivot = np.zeros(values[0].shape, dtype=np.int64)
+        for value in reversed(values):
+            pivot = np.where(value != 0, value, pivot)
+        pivot = np.where(pivot == 0, 1, pivot)
+        inverses = _batch_inverse(pivot.ravel(), self._base).reshape(
+            pivot.shape)
+        return [self._new(value*inverses % self._base) for value in values]
+
+    @classmethod
+    def random(cls, size=1):
+        """
+        Return a random array of field objects.
+        """
+        return cls(np.random.randint(0, cls.base, size))
+
+def _reduce_fractions(pairs):
+    """
+    Scale a list of (numerator, denominator) pairs, the first of which is
+    non-zero, to a list of coprime integers whose first element is positive.
+    """
+    common_denom = 1
+    for _, den in pairs:
+        common_denom *= den/gcd(common_denom, den)
+    nums = [num*(common_denom/den) for num, den in pairs]
+
+    gcd_ = 0
+    for num in nums:
+        gcd_ = gcd(gcd_, num)
+    if nums[0] < 0:
+        gcd_ = -gcd_
+    return [num/gcd_ for num in nums]
+
 class Rational(Field):
+    """
+    An exact rational number num/den, with den > 0.
+
+    Arithmetic uses Henrici's cross-cancellation so that results come out
+    already in lowest terms without a gcd of the full products. Setting
+    Rational.defer_reduce to True skips even this, leaving arithmetic results
+    unreduced until they are compared, printed or reduced. Deep constructions
+    may then run faster, at the cost of the num and den attributes of
+    intermediate results carrying common factors.
+    """
+
+    __slots__ = ('num', 'den')
 
     _min_random = -10
     _max_random = 10
 
+    defer_reduce = False
+
     def __init__(self, num, den=1):
         Field.__init__(self, (num, den))
         self.num = num
@@ -238,16 +741,38 @@ class Rational(Field):
                 "Denominator must be an integer (%s)" % str(self.den)
         self._reduce()
 
+    @classmethod
+    def _new(cls, num, den):
+        """
+        Create a rational from integers, skipping the argument checks and
+        reduction performed by the constructor.
+        """
+        rational = Field.__new__(cls)
+        rational.num = num
+        rational.den = den
+        return rational
+
     def __repr__(self):
-        return "%d/%d" % (self.num, self.den)
+        return "%d/%d" % self._normalized()
+
+    def __reduce__(self):
+        return self.__class__, (self.num, self.den)
 
     def _reduce(self):
         """
         Reduce the values to remove any common factors.
         """
+        self.num, self.den = self._normalized()
+
+    def _normalized(self):
+        """
+        Return the (numerator, denominator) pair of this number in lowest
+        terms, with a positive denominator.
+        """
         gcd_ = gcd(self.num, self.den)
-        self.num /= gcd_
-        self.den /= gcd_
+        if self.den < 0:
+            gcd_ = -gcd_
+        return self.num/gcd_, self.den/gcd_
 
     def _get_num_den(self, other):
         """
@@ -262,18 +787,40 @@ class Rational(Field):
         else:
             raise TypeError, str(self.__class__) + str(other.__class__)
 
+    def _add(self, a1, b1, a2, b2):
+        """
+        Return a1/b1 + a2/b2, for positive b1 and b2.
+        """
+        if self.defer_reduce:
+            return self._new(a1*b2 + a2*b1, b1*b2)
+        if b1 == b2 == 1:
+            return self._new(a1 + a2, 1)
+        d1 = gcd(b1, b2)
+        if d1 == 1:
+            return self._new(a1*b2 + a2*b1, b1*b2)
+        t = a1*(b2/d1) + a2*(b1/d1)
+        d2 = gcd(t, d1)
+        return self._new(t/d2, (b1/d1)*(b2/d2))
+
+    def _mul(self, a1, b1, a2, b2):
+        """
+        Return (a1/b1)*(a2/b2), for positive b1 and b2.
+        """
+        if self.defer_reduce:
+            return self._new(a1*a2, b1*b2)
+        g1 = gcd(a1, b2)
+        g2 = gcd(a2, b1)
+        return self._new((a1/g1)*(a2/g2), (b1/g2)*(b2/g1))
+
     def __add__(self, other):
-        a1, b1 = self.num, self.den
         a2, b2 = self._get_num_den(other)
-        return Rational(a1*b2 + a2*b1, b1*b2)
+        return self._add(self.num, self.den, a2, b2)
 
     def __sub__(self, other):
-        a1, b1 = self.num, self.den
         a2, b2 = self._get_num_den(other)
-        return Rational(a1*b2 - a2*b1, b1*b2)
+        return self._add(self.num, self.den, -a2, b2)
 
     def __mul__(self, other):
-        a1, b1 = self.num, self.den
         try:
             a2, b2 = self._get_num_den(other)
         except TypeError:
@@ -284,18 +831,18 @@ class Rational(Field):
                 return x
             except:
                 raise TypeError
-        return Rational(a1*a2, b1*b2)
+        return self._mul(self.num, self.den, a2, b2)
 
     def __neg__(self):
-        a1, b1 = self.num, self.den
-        return Rational(-a1, b1)
+        return self._new(-self.num, self.den)
 
     def __div__(self, other):
-        a1, b1 = self.num, self.den
         a2, b2 = self._get_num_den(other)
-        if b1*a2 == 0:
+        if a2 == 0:
             raise ZeroDivisionError
-        return Rational(a1*b2, b1*a2)
+        if a2 < 0:
+            a2, b2 = -a2, -b2
+        return self._mul(self.num, self.den, b2, a2)
 
     def __radd__(self, other):
         return self + other 
@@ -310,23 +857,32 @@ class Rational(Field):
         a1, b1 = self.num, self.den
         if a1 == 0:
             raise ZeroDivisionError
-        return other * Rational(b1, a1)
+        if a1 < 0:
+            a1, b1 = -a1, -b1
+        return other * self._new(b1, a1)
 
     def __eq__(self, other):
         if type(other) in [int, long]:
-            return self.num == other and self.den == 1
+            return self.num == other*self.den
         elif other.__class__ == self.__class__:
-            return other.num == self.num and other.den == self.den
+            return self.num*other.den == other.num*self.den
         else:
             raise TypeError, "Equality not defined for (%s)" % str(other)
 
+    def __hash__(self):
+        num, den = self._normalized()
+        if den == 1:
+            return hash(num)
+        return hash((num, den))
+
     def is_square(self):
         """
         Boolean function to check if the number is a square in the field.
 
         E.g. for a given x \in F, does there exist an a \in F such that a*a = x.
         """
-        return is_square(self.num) and is_square(self.den)
+        num, den = self._normalized()
+        return is_square(num) and is_square(den)
 
     def sqrt(self):
         """
@@ -336,38 +892,204 @@ class Rational(Field):
 
         If no such a exists, raises ValueError.
         """
-        if self.is_square():
-            return Rational(isqrt(self.num), isqrt(self.den))
-        else:
+        num, den = self._normalized()
+        num, den = exact_sqrt(num), exact_sqrt(den)
+        if num is None or den is None:
             raise ValueError, "%s is not a square" % str(self)
+        return self._new(num, den)
 
     def reduce(self, others):
         """
         Reduce this number, along with a list of others so that all common
         factors are removed.
+
+        The numbers are scaled to coprime integers, with this number positive.
         """
         if self == 0:
+            zero = self._new(0, 1)
             if others:
-                return [self] + others[0].reduce(others[1:])
+                return [zero] + others[0].reduce(others[1:])
             else:
-                return [self]
+                return [zero]
 
-        common_denom = self.den
-        for x in others:
-            common_denom *= x.den
+        pairs = [self._normalized()] + [x._normalized() for x in others]
+        return [self._new(num, 1) for num in _reduce_fractions(pairs)]
+
+    @classmethod
+    def random(cls):
+        """
+        Return a random field object.
+        """
+        num = random.randint(cls._min_random, cls._max_random)
+        den = random.randint(cls._min_random, cls._max_random)
+        if den == 0:
+            den = 1
+        return cls(num, den)
 
 
-        self = self*common_denom
-        others = [x*common_denom for x in others]
+class FractionRational(Field):
+    """
+    A rational number which delegates its arithmetic to a rational type
+    implemented outside of pygeom, by default fractions.Fraction.
+
+    It provides the same interface as Rational, including the num and den
+    attributes, so the two can be used interchangeably. Use rational_backend()
+    to pick the fastest implementation available.
+    """
 
-        gcd_ = self.num
-        for x in others:
-            gcd_ = gcd(gcd_, x.num)
+    __slots__ = ('value',)
 
-        self = self.__div__(gcd_)
-        others = [x/gcd_ for x in others]
-        return [self] + others
+    _min_random = -10
+    _max_random = 10
 
+    _type = Fraction
+
+    def __init__(self, num, den=1):
+        Field.__init__(self, (num, den))
+        if self._type is None:
+            raise ImportError, "%s is not available" % self.__class__.__name__
+        if den == 0:
+            raise ValueError, "Denominator in rational cannot be zero"
+        if type(num) not in [int, long]:
+            raise TypeError, "Numerator must be an integer (%s)" % str(num)
+        if type(den) not in [int, long]:
+            raise TypeError, "Denominator must be an integer (%s)" % str(den)
+        self.value = self._type(num, den)
+
+    def __reduce__(self):
+        # gmpy2 gives mpz numerators, which the constructor rejects
+        return self.__class__, (int(self.value.numerator),
+                                int(self.value.denominator))
+
+    @classmethod
+    def _new(cls, value):
+        """
+        Wrap a value of the underlying rational type.
+        """
+        rational = Field.__new__(cls)
+        rational.value = value
+        return rational
+
+    @property
+    def num(self):
+        """
+        The numerator, in lowest terms.
+        """
+        return int(self.value.numerator)
+
+    @property
+    def den(self):
+        """
+        The denominator, in lowest terms. This is always positive.
+        """
+        return int(self.value.denominator)
+
+    def __repr__(self):
+        return "%d/%d" % (self.num, self.den)
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def _value(self, other):
+        """
+        Return the underlying value of another number. Handles both rationals
+        of this class and regular integers. Other types will raise a
+        TypeError.
+        """
+        if type(other) in [int, long]:
+            return other
+        elif other.__class__ == self.__class__:
+            return other.value
+        else:
+            raise TypeError, str(self.__class__) + str(other.__class__)
+
+    def __add__(self, other):
+        return self._new(self.value + self._value(other))
+
+    def __sub__(self, other):
+        return self._new(self.value - self._value(other))
+
+    def __mul__(self, other):
+        try:
+            value = self._value(other)
+        except TypeError:
+            try:
+                x = other.__rmul__(self)
+                if x == NotImplemented:
+                    raise NotImplementedError
+                return x
+            except:
+                raise TypeError
+        return self._new(self.value * value)
+
+    def __neg__(self):
+        return self._new(-self.value)
+
+    def __div__(self, other):
+        value = self._value(other)
+        if value == 0:
+            raise ZeroDivisionError
+        return self._new(self.value / self._type(value))
+
+    def __radd__(self, other):
+        return self + other
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __rmul__(self, other):
+        return self * other
+
+    def __rdiv__(self, other):
+        if self.value == 0:
+            raise ZeroDivisionError
+        return self._new(self._type(self._value(other)) / self.value)
+
+    def __eq__(self, other):
+        if type(other) in [int, long]:
+            return self.value == other
+        elif other.__class__ == self.__class__:
+            return self.value == other.value
+        else:
+            raise TypeError, "Equality not defined for (%s)" % str(other)
+
+    def is_square(self):
+        """
+        Boolean function to check if the number is a square in the field.
+
+        E.g. for a given x \in F, does there exist an a \in F such that a*a = x.
+        """
+        return is_square(self.num) and is_square(self.den)
+
+    def sqrt(self):
+        """
+        The square root of the number in the field.
+
+        Returns the value a \in F such that a*a = x.
+
+        If no such a exists, raises ValueError.
+        """
+        num, den = exact_sqrt(self.num), exact_sqrt(self.den)
+        if num is None or den is None:
+            raise ValueError, "%s is not a square" % str(self)
+        return self.__class__(num, den)
+
+    def reduce(self, others):
+        """
+        Reduce this number, along with a list of others so that all common
+        factors are removed.
+
+        The numbers are scaled to coprime integers, with this number positive.
+        """
+        if self == 0:
+            zero = self.__class__(0)
+            if others:
+                return [zero] + others[0].reduce(others[1:])
+            else:
+                return [zero]
+
+        pairs = [(x.num, x.den) for x in [self] + others]
+        return [self.__class__(num) for num in _reduce_fractions(pairs)]
 
     @classmethod
     def random(cls):
@@ -379,5 +1101,39 @@ class Rational(Field):
         if den == 0:
             den = 1
         return cls(num, den)
-                              
 
+class MPQRational(FractionRational):
+    """
+    A rational number which delegates its arithmetic to gmpy2's mpq type.
+
+    Constructing one raises ImportError if gmpy2 is not installed.
+    """
+
+    __slots__ = ()
+
+    _type = getattr(gmpy2, "mpq", None)
+
+RATIONAL_BACKENDS = {
+    "python": Rational,
+    "fraction": FractionRational,
+    "gmpy2": MPQRational,
+    }
+
+def rational_backend(name=None):
+    """
+    Return the rational number class of the named backend: "gmpy2" (backed by
+    gmpy2.mpq), "fraction" (backed by fractions.Fraction) or "python" (the
+    Rational class implemented here).
+
+    By default the fastest available backend is returned. This is gmpy2 when
+    it is installed, and Rational otherwise, which outperforms Fraction.
+    """
+    if name is None:
+        if MPQRational._type is not None:
+            name = "gmpy2"
+        else:
+            name = "python"
+    cls = RATIONAL_BACKENDS[name]
+    if cls is MPQRational and MPQRational._type is None:
+        raise ImportError, "gmpy2 is not installed"
+    return cls
@@ -1,22 +1,93 @@
 # pylint: disable-msg=C0103
 
+import atexit
+from weakref import WeakValueDictionary
+
+_GEOMETRIES = WeakValueDictionary()
+# Drop the weak references before interpreter teardown, when their callbacks
+# can no longer run.
+atexit.register(_GEOMETRIES.clear)
+
 class Geometry(object):
+    """
+    A bilinear form [a b ; b c] defining the dot product of a plane.
+
+    Geometries are interned: constructing a geometry with the same form, over
+    the same field, returns the existing object, so that geometries can be
+    compared by identity.
+
+    The determinant, the inverse and adjugate matrices are computed once, when
+    the geometry is created. Diagonal forms (b == 0, such as blue and red) and
+    the green form (a == c == 0) use specialised versions of the matrix
+    operations.
+    """
+
+    def __new__(cls, a, b, c):
+        key = (cls, a.__class__, b.__class__, c.__class__, a, b, c)
+        try:
+            geometry = _GEOMETRIES.get(key)
+        except TypeError:
+            # Unhashable values can't be interned.
+            key, geometry = None, None
+        if geometry is not None:
+            return geometry
+
+        geometry = object.__new__(cls)
+        geometry._setup(a, b, c)
+        if key is not None:
+            geometry = _GEOMETRIES.setdefault(key, geometry)
+        return geometry
 
-    def __init__(self, a, b, c):
+    def __reduce__(self):
+        # Unpickled and copied geometries are interned like new ones.
+        return self.__class__, self.form
+
+    def _setup(self, a, b, c):
+        """
+        Precompute the invariants of the form [a b ; b c].
+        """
         self.form = a, b, c
-        if self.det() == 0:
+        self.determinant = det = a*c - b*b
+        if det == 0:
             raise ValueError, "Singular matrix cannot be used for a geometry."
+        self.adjugate = c, -b, a
+        self.inverse = c/det, -b/det, a/det
 
-    def dot(self, point1, point2):
+        # The shape of the form, which selects the specialised arithmetic
+        # in apply() and perpendicular().
+        self._diagonal = b == 0
+        self._green = not self._diagonal and a == 0 and c == 0
+
+    def apply(self, x, y):
+        """
+        Return the product of the form matrix with the vector [x, y].
+        """
         a, b, c = self.form
-        x1, y1 = point1.x, point1.y
-        x2, y2 = point2.x, point2.y
+        if self._diagonal:
+            return a*x, c*y
+        if self._green:
+            return b*y, b*x
+        return a*x + b*y, b*x + c*y
 
-        return x1*(a*x2 + b*y2) + y1*(b*x2 + c*y2)
+    def perpendicular(self, a1, b1):
+        """
+        Return the direction vector of the lines perpendicular to the line
+        a1*x + b1*y + c1 = 0. This is the adjugate matrix applied to the
+        normal [a1, b1].
+        """
+        a, b, c = self.form
+        if self._diagonal:
+            return c*a1, a*b1
+        if self._green:
+            return -b*b1, -b*a1
+        return c*a1 - b*b1, a*b1 - b*a1
+
+    def dot(self, point1, point2):
+        mx, my = self.apply(point2.x, point2.y)
+        return point1.x*mx + point1.y*my
 
     def det(self):
-        a, b, c = self.form
-        return a*c - b*b
+        return self.determinant
 
     def norm(self, point):
         return self.dot(point, point)
@@ -26,27 +97,46 @@ class Geometry(object):
         return "[%s %s ; %s %s]" % (str(a), str(b), str(b), str(c))
 
     def __eq__(self, other):
+        if other is self:
+            return True
         return bool(self.__class__ == other.__class__ and 
                     self.form == other.form)
 
     def __ne__(self, other):
         return not (self == other)
 
+    def __hash__(self):
+        return hash((self.__class__, self.form))
+
+_CANONICAL = {}
+
+def _canonical(name, field, form):
+    """
+    Return the named canonical geometry over a field, creating it on first
+    use. Fields with a variable base are cached separately for each base.
+    """
+    key = name, field, getattr(field, "base", None)
+    geometry = _CANONICAL.get(key)
+    if geometry is None:
+        geometry = Geometry(*[field(value) for value in form])
+        _CANONICAL[key] = geometry
+    return geometry
+
 def blue(field):
     """
     The canonical "blue" geometry.
     """
-    return Geometry(field(1), field(0), field(1))
+    return _canonical("blue", field, (1, 0, 1))
 
 def green(field):
     """
     The canonical "green" geometry.
     """
-    return Geometry(field(0), field(1), field(0))
+    return _canonical("green", field, (0, 1, 0))
 
 def red(field):
     """
     The canonical "red" geometry.
     """
-    return Geometry(field(1), field(0), field(-1))
+    return _canonical("red", field, (1, 0, -1))
 
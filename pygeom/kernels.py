@@ -0,0 +1,88 @@
+"""
+Closed-form perpendicular constructions.
+
+For the line l: a1*x + b1*y + c1 = 0 with normal n = [a1, b1], the adjugate
+of the geometry's form applied to n gives the direction w perpendicular to
+the line, and n.w = d1 is zero exactly when the line is null. The foot of
+the perpendicular from P is then P - (l(P)/d1)*w, and the quadrance from P
+to the line is det*l(P)^2/d1. None of these need a square root, or any
+division other than by d1.
+
+Each function accepts a Point, or a PointSet to apply the construction to
+every point of the set against one line at once.
+"""
+
+from pygeom.core import Line, LineSet, PointSet
+from pygeom.util import check_geometry, NullLineError
+
+def _perpendicular(line):
+    """
+    Return the direction (wx, wy) perpendicular to a line, and n.w. A
+    NullLineError is raised if the line is null.
+    """
+    a1, b1, _ = line.form()
+    wx, wy = line.geometry.perpendicular(a1, b1)
+    d1 = a1*wx + b1*wy
+    if d1 == 0:
+        raise NullLineError
+    return wx, wy, d1
+
+@check_geometry
+def foot(point, line):
+    """
+    Return the foot of the perpendicular from a point to a line.
+    """
+    wx, wy, d1 = _perpendicular(line)
+    x, y = point.form()
+    t = line.eval(x, y)/d1
+    return point.__class__(x - t*wx, y - t*wy, point.geometry)
+
+@check_geometry
+def altitude(point, line):
+    """
+    Return the line through a point perpendicular to a line, as a LineSet
+    for a PointSet.
+    """
+    wx, wy, _ = _perpendicular(line)
+    x, y = point.form()
+    if isinstance(point, PointSet):
+        zero = 0*x
+        return LineSet(zero + wy, zero - wx, wx*y - wy*x, point.geometry)
+    return Line(wy, -wx, wx*y - wy*x, point.geometry)
+
+@check_geometry
+def reflection(point, line):
+    """
+    Return the reflection of a point in a line.
+    """
+    wx, wy, d1 = _perpendicular(line)
+    x, y = point.form()
+    t = 2*line.eval(x, y)/d1
+    return point.__class__(x - t*wx, y - t*wy, point.geometry)
+
+@check_geometry
+def quadrance(point, line):
+    """
+    Return the quadrance from a point to a line, det*l(P)^2/d1.
+    """
+    _, _, d1 = _perpendicular(line)
+    x, y = point.form()
+    value = line.eval(x, y)
+    return line.geometry.determinant*value*value/d1
+
+@check_geometry
+def midpoint(point1, point2):
+    """
+    Return the midpoint of two points. A ValueError is raised if the line
+    between them is null, as the midpoint is then not defined.
+    """
+    null = (point1 - point2).null()
+    if isinstance(point1, PointSet):
+        null = null.any()
+    if null:
+        raise ValueError, \
+            "The line between %s and %s is null, " \
+            "so the midpoint is not defined" % (str(point1), str(point2))
+    x1, y1 = point1.form()
+    x2, y2 = point2.form()
+    return point1.__class__((x1 + x2)/2, (y1 + y2)/2, point1.geometry)
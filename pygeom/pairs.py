@@ -3,8 +3,11 @@ This module contains classes which represent pairs of core objects.
 Using pairs of core objects we can then construct further objects.
 """
 
+from pygeom import kernels, predicates
 from pygeom.core import Point, Line, Conic
-from pygeom.util import check_geometry, NullLineError, GeometryError, M
+from pygeom.tables import SpreadTable, QuadranceTable
+from pygeom.util import check_geometry, NullLineError, GeometryError, M, \
+    verify, memoized
 
 class LineSegment(object):
     """
@@ -29,9 +32,16 @@ class LineSegment(object):
         self.line = Line(y1 - y2, x2 - x1, x1*y2 - x2*y1, self.geometry)
 
     def __eq__(self, other):
-        return (self.point1 in [other.point1, other.point2] and
-                self.point2 in [other.point1, other.point2] and
-                self.geometry == other.geometry)
+        return (self.geometry == other.geometry and
+                frozenset([self.point1, self.point2]) ==
+                frozenset([other.point1, other.point2]))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((LineSegment, frozenset([self.point1, self.point2]),
+                     self.geometry))
 
     @check_geometry
     def midpoint(self):
@@ -39,11 +49,9 @@ class LineSegment(object):
         Return the midpoint M of the two points of the line segments so
         that Q(M, point1) == Q(M, point2).
         """
-        line0 = self.perp_bisector()
-
-        # Find where the equidistant line intersects our line
-        return Vertex(self.line, line0).point
+        return kernels.midpoint(self.point1, self.point2)
 
+    @memoized("LineSegment.perp_bisector")
     @check_geometry
     def perp_bisector(self):
         """
@@ -54,8 +62,9 @@ class LineSegment(object):
         a, b, c = self.geometry.form
 
         # Calculate the line of equidistant points
-        a0 = 2*(a*(x1 - x2) + b*(y1 - y2))
-        b0 = 2*(b*(x1 - x2) + c*(y1 - y2))
+        mx, my = self.geometry.apply(x1 - x2, y1 - y2)
+        a0 = 2*mx
+        b0 = 2*my
         c0 = -(a*(x1*x1 - x2*x2) + 2*b*(x1*y1 - x2*y2) + c*(y1*y1 - y2*y2))
 
         line0 = Line(a0, b0, c0, self.geometry)
@@ -83,13 +92,13 @@ class LineSegment(object):
         X02 = self.point1.norm()
         X12 = self.point2.norm()
 
-        aa, bb, cc = M(a*(x2 - x1) + b*(y2 - y1), b*(x2 - x1) + c*(y2 - y1))
+        mx, my = self.geometry.apply(x2 - x1, y2 - y1)
+        sx, sy = self.geometry.apply(x1 + x2, y1 + y2)
+        aa, bb, cc = M(mx, my)
 
         return Conic(4*(aa - K*a), 4*2*(bb - K*b), 4*(cc - K*c),
-                     4*(X02 - X12)*(a*(x2 - x1) + b*(y2 - y1)) + \
-                         4*K*(a*(x1 + x2) + b*(y1 + y2)),
-                     4*(X02 - X12)*(b*(x2 - x1) + c*(y2 - y1)) + \
-                         4*K*(b*(x1 + x2) + c*(y1 + y2)),
+                     4*(X02 - X12)*mx + 4*K*sx,
+                     4*(X02 - X12)*my + 4*K*sy,
                      (K - X02 - X12)*(K - X02 - X12) - 4*X02*X12,
                      self.geometry)
 
@@ -122,18 +131,23 @@ class Vertex(object):
                                self.geometry)
 
     def __eq__(self, other):
-        return (self.line1 in [other.line1, other.line2] and
-                self.line2 in [other.line1, other.line2] and
-                self.geometry == other.geometry)
+        return (self.geometry == other.geometry and
+                frozenset([self.line1, self.line2]) ==
+                frozenset([other.line1, other.line2]))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((Vertex, frozenset([self.line1, self.line2]),
+                     self.geometry))
 
 
     def parallel(self):
         """
         Boolean function to determine if two lines are parallel.
         """
-        a1, b1, _ = self.line1.form()
-        a2, b2, _ = self.line2.form()        
-        return a1*b2 - a2*b1 == 0
+        return predicates.parallel(self.line1, self.line2)
 
     @check_geometry
     def spread(self):
@@ -142,6 +156,10 @@ class Vertex(object):
         
         s = 1 - (U.V)^2/(|U||V|)
         """
+        table = SpreadTable.get(self.geometry)
+        if table is not None:
+            return table.spread(self.line1, self.line2)
+
         vec1 = self.line1.vector()
         vec2 = self.line2.vector()
 
@@ -160,7 +178,7 @@ class Vertex(object):
         """
         Boolean function to determine if two lines are perpendicular
         """
-        return self.spread() == 1
+        return predicates.perpendicular(self.line1, self.line2)
 
 
     @check_geometry
@@ -179,36 +197,40 @@ class Vertex(object):
         X1 = X + V*mu + U
         X2 = X - V*mu + U
 
-        assert (V*mu).norm() == U.norm()
-
-        assert PointLine(X + V*mu, self.line1).on()
-        assert PointLine(X - V*mu, self.line1).on()
-
         l1 = LineSegment(X, X1).line
         l2 = LineSegment(X, X2).line
 
-        spread = Vertex(l1, self.line1).spread()
-        assert self.spread() == 4*spread*(1 - spread)
+        def check():
+            spread = Vertex(l1, self.line1).spread()
+            return ((V*mu).norm() == U.norm() and
+                    PointLine(X + V*mu, self.line1).on() and
+                    PointLine(X - V*mu, self.line1).on() and
+                    self.spread() == 4*spread*(1 - spread))
+        verify(check, "Vertex.bisect() failed its self-check")
 
         return Vertex(l1, l2)
 
     @check_geometry
     def grammola(self, K):
         #pylint: disable-msg=R0914
-        a1, b1, c1 = self.line1.form()
-        a2, b2, c2 = self.line2.form()
+        # The scale of the conic depends on the scale of the lines, which
+        # Conic.co_diagonal() expects to be reduced.
+        a1, b1, c1 = self.line1.canonical_form()
+        a2, b2, c2 = self.line2.canonical_form()
         a, b, c = self.geometry.form
     
-        d1 = self.line1.vector().norm()
-        d2 = self.line2.vector().norm()
+        d1 = a*b1*b1 - 2*b*a1*b1 + c*a1*a1
+        d2 = a*b2*b2 - 2*b*a2*b2 + c*a2*a2
+        det = self.geometry.determinant
 
         conic = Conic(d1*a2*a2 + d2*a1*a1, 2*(d1*a2*b2 + d2*a1*b1),
                       d1*b2*b2 + d2*b1*b1,
                       2*(d2*c1*a1 + d1*c2*a2), 2*(d2*c1*b1 + d1*c2*b2),
-                      c1*c1*d2 + c2*c2*d1 - K*d1*d2/self.geometry.det(),
+                      c1*c1*d2 + c2*c2*d1 - K*d1*d2/det,
                       self.geometry)
         A, B, C = conic.a, conic.b, conic.c
-        assert a*C - b*B + c*A ==  2*d1*d2
+        verify(lambda: a*C - b*B + c*A == 2*d1*d2,
+               "Vertex.grammola() failed its self-check")
         return conic
 
 
@@ -232,21 +254,33 @@ class PointLine(object):
                 self.line == other.line and
                 self.geometry == other.geometry)
 
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((PointLine, self.point, self.line))
+
     def on(self):
         """
         Boolean function to determine whether the point lies on the line.
         """
-        x, y = self.point.form()
-        return self.line.eval(x, y) == 0
+        return predicates.on(self.point, self.line)
 
     @check_geometry
     def reflection(self):
         """
         Return the reflection of this point in the given line.
         """
-        foot = self.altitude().point
-        return PointLine(foot - (self.point - foot), self.line)
+        return PointLine(kernels.reflection(self.point, self.line), self.line)
+
+    @check_geometry
+    def foot(self):
+        """
+        Return the foot of the perpendicular from the point to the line.
+        """
+        return kernels.foot(self.point, self.line)
 
+    @memoized("PointLine.altitude")
     @check_geometry
     def altitude(self):
         """
@@ -254,13 +288,25 @@ class PointLine(object):
         This is a line which goes through the point and is perpendicular to
         the line.
         """
-        altitude_vertex = self.construct_spread(1)
-        assert altitude_vertex.line1 == altitude_vertex.line2
-        return PointLine(Vertex(self.line, altitude_vertex.line1).point, altitude_vertex.line1)
+        foot = kernels.foot(self.point, self.line)
+        line = kernels.altitude(self.point, self.line)
+
+        def check():
+            a1, b1, _ = self.line.form()
+            a2, b2, _ = line.form()
+            return (self.line.eval(*foot.form()) == 0 and
+                    line.eval(*foot.form()) == 0 and
+                    line.eval(*self.point.form()) == 0 and
+                    self.geometry.dot(Point(-b1, a1), Point(-b2, a2)) == 0)
+        verify(check, "PointLine.altitude() failed its self-check")
+        return PointLine(foot, line)
 
     @check_geometry
     def quadrance(self):
-        return LineSegment(self.altitude().point, self.point).quadrance()
+        """
+        Calculate the quadrance from the point to the line.
+        """
+        return kernels.quadrance(self.point, self.line)
 
     def parallel(self):
         """
@@ -277,6 +323,27 @@ class PointLine(object):
         Calculate the line segment whose points lie on this line
         and are a given quadrance from this point.
         """
+        table = QuadranceTable.get(self.geometry)
+        if table is not None:
+            point1, point2 = table.quadrance_points(self.point, self.line,
+                                                    quadrance)
+        else:
+            point1, point2 = self._solve_quadrance(quadrance)
+
+        def check():
+            return (PointLine(point1, self.line).on() and
+                    PointLine(point2, self.line).on() and
+                    LineSegment(point1, self.point).quadrance() == quadrance and
+                    LineSegment(point2, self.point).quadrance() == quadrance)
+        verify(check, "PointLine.construct_quadrance() failed its self-check")
+
+        return LineSegment(point1, point2)
+
+    def _solve_quadrance(self, quadrance):
+        """
+        Solve for the two points on this line which are a given quadrance
+        from this point.
+        """
         #pylint: disable-msg=R0914
 
         # unpack all the variables
@@ -336,18 +403,10 @@ class PointLine(object):
             x1 = -(b1*y1 + c1)/a1
             x2 = -(b1*y2 + c1)/a1
         
-        point1 = Point(x1, y1, self.geometry)
-        point2 = Point(x2, y2, self.geometry)
-
-        assert PointLine(point1, self.line).on()
-        assert PointLine(point2, self.line).on()
-
-        assert LineSegment(point1, self.point).quadrance() == quadrance
-        assert LineSegment(point2, self.point).quadrance() == quadrance
-        
-        return LineSegment(point1, point2)
+        return Point(x1, y1, self.geometry), Point(x2, y2, self.geometry)
         
 
+    @memoized("PointLine.construct_spread")
     @check_geometry
     def construct_spread(self, spread):
         """
@@ -362,6 +421,28 @@ class PointLine(object):
             par = self.parallel()
             return Vertex(par, par)
 
+        table = SpreadTable.get(self.geometry)
+        lines = table and table.spread_lines(self.point, self.line, spread)
+        if lines is None:
+            lines = self._solve_spread(spread)
+        l2, l3 = lines
+
+        def check():
+            return (PointLine(self.point, l2).on() and
+                    PointLine(self.point, l3).on() and
+                    (Vertex(l2, l3).point == self.point or
+                     (l2 == l3 and spread == 1)) and
+                    (Vertex(self.line, l2).spread() == spread or l2.null()) and
+                    (Vertex(self.line, l3).spread() == spread or l3.null()))
+        verify(check, "PointLine.construct_spread() failed its self-check")
+
+        return Vertex(l2, l3)
+
+    def _solve_spread(self, spread):
+        """
+        Solve for the two lines through this point which make a given spread
+        with this line.
+        """
         a, b, c = self.geometry.form
         x0, y0 = self.point.form()
         a1, b1, _ = self.line.form()
@@ -369,15 +450,19 @@ class PointLine(object):
         U = self.line.vector()
         k = (1 - spread)*U.norm()
 
+        # The direction perpendicular to the line is [-n, m]
+        n, m = self.geometry.perpendicular(a1, b1)
+        n = -n
+
         # set up the parameters to solve
         # alpha * x^2 + beta * x * y + gamma * y^2 = 0
         # if alpha == 0:
         #  => b * x * y + gamma * y * y == 0
         #     y(b * x + gamma * y) == 0
         #     x/y == -gamma/beta
-        alpha =    (a*b1 - b*a1)*(a*b1 - b*a1) - k*a
-        beta  = 2*((a*b1 - b*a1)*(b*b1 - c*a1) - b*k)
-        gamma =    (b*b1 - c*a1)*(b*b1 - c*a1) - k*c
+        alpha =    m*m - k*a
+        beta  = 2*(m*n - b*k)
+        gamma =    n*n - k*c
 
         if alpha == 0:
             a2 = alpha     # = 0; We use alpha like this
@@ -395,18 +480,8 @@ class PointLine(object):
         c2 = -(a2*x0 + b2*y0)
         c3 = -(a3*x0 + b3*y0)
             
-        l2 = Line(a2, b2, c2, self.geometry)
-        l3 = Line(a3, b3, c3, self.geometry)
-
-        assert PointLine(self.point, l2).on()
-        assert PointLine(self.point, l3).on()
-
-        assert Vertex(l2, l3).point == self.point or (l2 == l3 and spread == 1)
-
-        assert Vertex(self.line, l2).spread() == spread or l2.null()
-        assert Vertex(self.line, l3).spread() == spread or l3.null()
-
-        return Vertex(l2, l3)
+        return (Line(a2, b2, c2, self.geometry),
+                Line(a3, b3, c3, self.geometry))
 
     @check_geometry
     def parabola(self):
@@ -428,11 +503,12 @@ class PointLine(object):
         a1, b1, c1 = self.line.form()
         x0, y0, = self.point.form()
 
-        alpha = self.geometry.det()/self.line.vector().norm()
+        alpha = self.geometry.determinant/self.line.vector().norm()
+        mx, my = self.geometry.apply(x0, y0)
     
         return Conic(a - K*alpha*a1*a1, 2*(b - K*alpha*a1*b1),
                      c - K*alpha*b1*b1,
-                     -2*(a*x0 + b*y0 + a1*c1*K*alpha),
-                     -2*(b*x0 + c*y0 + b1*c1*K*alpha),
+                     -2*(mx + a1*c1*K*alpha),
+                     -2*(my + b1*c1*K*alpha),
                      self.point.norm() - K*alpha*c1*c1,
                      self.geometry)
@@ -0,0 +1,260 @@
+"""
+This module provides an index of the points and lines of the affine plane
+over a finite field GF(p), for exhaustive searches over configurations.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from pygeom.core import Point, Line
+from pygeom.util import inverse
+
+class FinitePlane(object):
+    """
+    The p^2 points and p^2 + p lines of the plane over GF(p), numbered with
+    integer IDs.
+
+    The point [x, y] has ID x*p + y. Lines are numbered by their canonical
+    form: the line x + b*y + c = 0 has ID b*p + c, and the line y + c = 0 has
+    ID p^2 + c.
+
+    The coordinates of every point and line are enumerated once, in integer
+    arrays. Incidence queries are then answered by O(p) vectorised arithmetic
+    on IDs, and joins and meets in O(1), rather than by testing all p^2
+    points.
+    """
+
+    def __init__(self, field, geometry=None):
+        if np is None:
+            raise ImportError, "FinitePlane requires numpy"
+        self.field = field
+        self.geometry = geometry
+        self.base = p = field.base
+        self.num_points = p*p
+        self.num_lines = p*p + p
+
+        self._range = np.arange(p, dtype=np.int64)
+        self._inverse = np.array([0] + [inverse(i, p) % p
+                                        for i in range(1, p)], dtype=np.int64)
+
+        ids = np.arange(self.num_points, dtype=np.int64)
+        self.points = np.column_stack([ids // p, ids % p])
+
+        ids = np.arange(self.num_lines, dtype=np.int64)
+        self.lines = np.column_stack([np.where(ids < p*p, 1, 0),
+                                      np.where(ids < p*p, ids // p, 1),
+                                      ids % p])
+
+    def __repr__(self):
+        return "FinitePlane(GF(%d))" % self.base
+
+    def point_id(self, point):
+        """
+        Return the ID of a Point.
+        """
+        return (point.x.value % self.base)*self.base + point.y.value % self.base
+
+    def line_id(self, line):
+        """
+        Return the ID of a Line.
+        """
+        a, b, c = line.canonical_form()
+        if a.value % self.base:
+            return (b.value % self.base)*self.base + c.value % self.base
+        if b.value % self.base:
+            return self.base*self.base + c.value % self.base
+        raise ValueError, "%s is not a line of the plane" % str(line)
+
+    def point(self, i):
+        """
+        Return the Point with ID i.
+        """
+        x, y = self.points[i]
+        return Point(self.field(int(x)), self.field(int(y)), self.geometry)
+
+    def line(self, j):
+        """
+        Return the Line with ID j.
+        """
+        a, b, c = self.lines[j]
+        return Line(self.field(int(a)), self.field(int(b)), self.field(int(c)),
+                    self.geometry)
+
+    def on(self, i, j):
+        """
+        Boolean function to check whether the point with ID i lies on the line
+        with ID j.
+        """
+        x, y = self.points[i]
+        a, b, c = self.lines[j]
+        return bool((a*x + b*y + c) % self.base == 0)
+
+    def points_on(self, j):
+        """
+        Return an array of the IDs of the p points on the line with ID j.
+        """
+        p, ys = self.base, self._range
+        a, b, c = self.lines[j]
+        if a:
+            # x = -(b*y + c)
+            return (-(b*ys + c) % p)*p + ys
+        # y = -c
+        return ys*p + (-c % p)
+
+    def lines_through(self, i):
+        """
+        Return an array of the IDs of the p + 1 lines through the point with
+        ID i.
+        """
+        p, bs = self.base, self._range
+        x, y = self.points[i]
+        # x + b*y + c = 0 for each b, then the line y + c = 0
+        return np.append(bs*p + (-(x + bs*y) % p), p*p + (-y % p))
+
+    def join(self, i1, i2):
+        """
+        Return the ID of the line through the points with IDs i1 and i2. A
+        ValueError is raised if the points are the same.
+        """
+        p = self.base
+        x1, y1 = self.points[i1]
+        x2, y2 = self.points[i2]
+        if y1 == y2:
+            if x1 == x2:
+                raise ValueError, "A line needs two distinct points"
+            return int(p*p + (-y1 % p))
+        b = (x2 - x1)*self._inverse[(y1 - y2) % p] % p
+        return int(b*p + (-(x1 + b*y1) % p))
+
+    def meet(self, j1, j2):
+        """
+        Return the ID of the point where the lines with IDs j1 and j2 meet,
+        or None if they are parallel. A ValueError is raised if the lines are
+        the same.
+        """
+        if j1 == j2:
+            raise ValueError, "Two distinct lines are needed to find a meet"
+        p = self.base
+        a1, b1, c1 = self.lines[j1]
+        a2, b2, c2 = self.lines[j2]
+        z = (a1*b2 - a2*b1) % p
+        if z == 0:
+            return None
+        z = self._inverse[z]
+        x = (b1*c2 - b2*c1)*z % p
+        y = (c1*a2 - c2*a1)*z % p
+        return int(x*p + y)
+
+
+def _bits(ids):
+    """
+    Return the uint64 words, and the bits within them, which hold the given
+    point IDs.
+    """
+    return ids >> 6, np.left_shift(np.uint64(1), (ids & 63).astype(np.uint64))
+
+def _popcount(words):
+    """
+    Count the set bits in each element of an array of uint64 words.
+    """
+    words = words - ((words >> 1) & np.uint64(0x5555555555555555))
+    words = ((words & np.uint64(0x3333333333333333)) +
+             ((words >> 2) & np.uint64(0x3333333333333333)))
+    words = (words + (words >> 4)) & np.uint64(0x0f0f0f0f0f0f0f0f)
+    return (words*np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+class IncidenceMatrix(object):
+    """
+    The incidence matrix between a list of lines and the p^2 points of the
+    plane over GF(p), with one row per line stored as packed bits in 64 bit
+    words.
+
+    A set of points is packed the same way, so the number of its points on
+    every line is found at once by AND-ing it with every row and counting the
+    set bits.
+    """
+
+    def __init__(self, lines, field):
+        """
+        Build the matrix from a list of Line objects over the given finite
+        field.
+        """
+        if np is None:
+            raise ImportError, "IncidenceMatrix requires numpy"
+        p = field.base
+        rows, ids = [], []
+        for row, line in enumerate(lines):
+            xs, ys = line.incidence_points(field)
+            rows.append(np.full(len(xs), row, dtype=np.int64))
+            ids.append(xs*p + ys)
+        self._build(lines, p, np.concatenate(rows or [[]]),
+                    np.concatenate(ids or [[]]))
+
+    @classmethod
+    def from_plane(cls, plane, line_ids=None):
+        """
+        Build the matrix for the lines of a FinitePlane with the given IDs
+        (all of them if not specified), without evaluating any Line objects.
+        """
+        if line_ids is None:
+            line_ids = range(plane.num_lines)
+        matrix = cls.__new__(cls)
+        ids = [plane.points_on(j) for j in line_ids]
+        rows = np.repeat(np.arange(len(ids)), plane.base)
+        matrix._build([plane.line(j) for j in line_ids], plane.base, rows,
+                      np.concatenate(ids or [[]]))
+        return matrix
+
+    def _build(self, lines, base, rows, ids):
+        """
+        Set the bit for each (row, point ID) pair.
+        """
+        self.lines = list(lines)
+        self.base = base
+        self.rows = np.zeros((len(self.lines), (base*base + 63) // 64),
+                             dtype=np.uint64)
+        rows, ids = rows.astype(np.int64), ids.astype(np.int64)
+        words, bits = _bits(ids)
+        np.bitwise_or.at(self.rows, (rows, words), bits)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def pack(self, points):
+        """
+        Return a set of points as a row of packed bits. The points may be
+        given as Point objects, a PointSet or an array of point IDs (x*p + y).
+        """
+        p = self.base
+        if hasattr(points, "x"):
+            ids = points.x.value*p + points.y.value
+        else:
+            ids = [point.x.value*p + point.y.value if hasattr(point, "x")
+                   else point for point in points]
+        ids = np.asarray(ids, dtype=np.int64)
+        packed = np.zeros(self.rows.shape[1], dtype=np.uint64)
+        words, bits = _bits(ids)
+        np.bitwise_or.at(packed, words, bits)
+        return packed
+
+    def count(self, points):
+        """
+        Return an array giving, for each line, the number of the points which
+        lie on it.
+        """
+        packed = self.pack(points)
+        columns = np.flatnonzero(packed)
+        if 2*len(columns) < len(packed):
+            # Only the words holding some of the points can contribute
+            rows, packed = self.rows[:, columns], packed[columns]
+        else:
+            rows = self.rows
+        return _popcount(rows & packed).sum(axis=1).astype(np.int64)
+
+    def at_least(self, points, k):
+        """
+        Return the indices of the lines containing at least k of the points.
+        """
+        return np.nonzero(self.count(points) >= k)[0]
@@ -31,14 +31,7 @@ class FinitePlot(Plot):
         handles = []
         labels = []
         for object, name, marker in self.objects:
-            xs = []
-            ys = []
-            l = object
-            for x in range(59):
-                for y in range(59):
-                    if object.eval(x, y) == 0:
-                        xs.append(x)
-                        ys.append(y)
+            xs, ys = object.incidence_points(FiniteField)
             print object, name, marker
             print zip(xs, ys)
             handles.append(ax.scatter(xs, ys, marker=marker, s=100))
@@ -0,0 +1,232 @@
+"""
+Division-free incidence and metric predicates.
+
+Each predicate is a single polynomial in the coordinates and coefficients of
+its arguments compared with zero, so no inverses are computed and no
+intermediate Points or Lines are built. The predicates read the attributes of
+their arguments directly, so they accept PointSets and LineSets as well as
+Points and Lines, and then return a boolean array with one entry for each
+element of the sets.
+
+Over the rationals the polynomials are first evaluated in floating point
+interval arithmetic. If the interval excludes zero the predicate is False,
+and the exact arithmetic, whose numerators grow with the depth of a
+construction, is only needed when it doesn't. The filter is on by default,
+and predicate_stats() reports how often each path was taken.
+"""
+
+import operator
+
+from pygeom.field import Rational, FractionRational
+from pygeom.util import check_geometry
+
+# A relative widening of at least one unit in the last place, and the
+# smallest positive float, which bounds the error of any rounded operation.
+_EPS = 2.0**-52
+_TINY = 2.0**-1074
+
+# The predicates are polynomials of degree at most four with small integer
+# coefficients, so no operation can overflow if the inputs are below this.
+_LIMIT = 2.0**200
+
+_STATS = {"filtered": 0, "exact": 0}
+_filtering = True
+
+def enable_filtering():
+    """
+    Evaluate predicates over the rationals in interval arithmetic before
+    falling back to exact arithmetic.
+    """
+    global _filtering
+    _filtering = True
+
+def disable_filtering():
+    """
+    Always evaluate predicates in exact arithmetic.
+    """
+    global _filtering
+    _filtering = False
+
+def predicate_stats():
+    """
+    Return a dictionary of the number of rational predicate evaluations
+    decided by the interval filter, and the number which needed exact
+    arithmetic.
+    """
+    return dict(_STATS)
+
+def reset_predicate_stats():
+    """
+    Reset the counts returned by predicate_stats().
+    """
+    _STATS["filtered"] = _STATS["exact"] = 0
+
+
+class Interval(object):
+    """
+    A closed interval [lo, hi] of floats, whose arithmetic rounds outwards so
+    that the result always contains the exact result for any values in the
+    operands.
+    """
+
+    __slots__ = ('lo', 'hi')
+
+    def __init__(self, lo, hi):
+        self.lo = lo
+        self.hi = hi
+
+    @classmethod
+    def from_rational(cls, value):
+        """
+        Return an interval containing a Rational (from any backend). An
+        OverflowError is raised if its magnitude is too large for the
+        predicates to be evaluated without overflow.
+        """
+        if value.__class__ is Rational:
+            # Integer true division is correctly rounded, including for
+            # mixed int and long operands
+            q = operator.truediv(value.num, value.den)
+        elif isinstance(value, FractionRational):
+            q = float(value.value)
+        else:
+            raise TypeError, "Not a rational (%s)" % str(value)
+        if not -_LIMIT < q < _LIMIT:
+            raise OverflowError, "%s is too large for an Interval" % str(value)
+        r = abs(q)*_EPS + _TINY
+        return cls(q - r, q + r)
+
+    def __repr__(self):
+        return "[%r, %r]" % (self.lo, self.hi)
+
+    def __add__(self, other):
+        if other.__class__ is not Interval:
+            other = Interval(float(other), float(other))
+        lo, hi = self.lo + other.lo, self.hi + other.hi
+        return Interval(lo - abs(lo)*_EPS - _TINY, hi + abs(hi)*_EPS + _TINY)
+
+    def __sub__(self, other):
+        if other.__class__ is not Interval:
+            other = Interval(float(other), float(other))
+        lo, hi = self.lo - other.hi, self.hi - other.lo
+        return Interval(lo - abs(lo)*_EPS - _TINY, hi + abs(hi)*_EPS + _TINY)
+
+    def __mul__(self, other):
+        if other.__class__ is not Interval:
+            other = Interval(float(other), float(other))
+        a, b = self.lo*other.lo, self.lo*other.hi
+        c, d = self.hi*other.lo, self.hi*other.hi
+        lo, hi = min(a, b, c, d), max(a, b, c, d)
+        return Interval(lo - abs(lo)*_EPS - _TINY, hi + abs(hi)*_EPS + _TINY)
+
+    def __neg__(self):
+        return Interval(-self.hi, -self.lo)
+
+    def __radd__(self, other):
+        return self + other
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __rmul__(self, other):
+        return self * other
+
+    def excludes_zero(self):
+        """
+        Boolean function to check if every value in the interval is non-zero.
+        """
+        return self.lo > 0 or self.hi < 0
+
+
+def _is_zero(polynomial, *args):
+    """
+    Check whether a polynomial is zero at the given arguments, first in
+    interval arithmetic if they are rationals.
+    """
+    if _filtering and isinstance(args[0], (Rational, FractionRational)):
+        try:
+            value = polynomial(*[Interval.from_rational(arg) for arg in args])
+        except (OverflowError, TypeError):
+            pass
+        else:
+            if value.excludes_zero():
+                _STATS["filtered"] += 1
+                return False
+        _STATS["exact"] += 1
+    return polynomial(*args) == 0
+
+def _parallel(a1, b1, a2, b2):
+    return a1*b2 - a2*b1
+
+def _perpendicular(a, b, c, a1, b1, a2, b2):
+    return a*b1*b2 - b*(a1*b2 + a2*b1) + c*a1*a2
+
+def _on(x, y, a, b, c):
+    return a*x + b*y + c
+
+def _through(x, y, a, b, c, d, e, f):
+    return a*x*x + b*x*y + c*y*y + d*x + e*y + f
+
+def _tangent(A, B, C, D, E, F, a, b, c):
+    t = B*c + D*b + E*a
+    return (t*t - 4*(A*C*c*c + A*F*b*b + C*F*a*a) +
+            4*((A*E - B*D)*b*c + (C*D - B*E)*a*c + (B*F - D*E)*a*b))
+
+def _collinear(x1, y1, x2, y2, x3, y3):
+    return (x2 - x1)*(y3 - y1) - (y2 - y1)*(x3 - x1)
+
+def _concurrent(a1, b1, c1, a2, b2, c2, a3, b3, c3):
+    return (a1*(b2*c3 - b3*c2) - b1*(a2*c3 - a3*c2) + c1*(a2*b3 - a3*b2))
+
+def parallel(line1, line2):
+    """
+    Check whether two lines are parallel, a1*b2 - a2*b1 == 0.
+    """
+    return _is_zero(_parallel, line1.a, line1.b, line2.a, line2.b)
+
+@check_geometry
+def perpendicular(line1, line2):
+    """
+    Check whether two lines are perpendicular, which is when their direction
+    vectors [-b, a] have a zero dot product. A null line is perpendicular to
+    itself.
+    """
+    a, b, c = line1.geometry.form
+    return _is_zero(_perpendicular, a, b, c,
+                    line1.a, line1.b, line2.a, line2.b)
+
+def on(point, line):
+    """
+    Check whether a point lies on a line, a*x + b*y + c == 0.
+    """
+    return _is_zero(_on, point.x, point.y, line.a, line.b, line.c)
+
+def through(conic, point):
+    """
+    Check whether a conic passes through a point.
+    """
+    return _is_zero(_through, point.x, point.y, conic.a, conic.b, conic.c,
+                    conic.d, conic.e, conic.f)
+
+def tangent(conic, line):
+    """
+    Check whether a line is tangent to a conic.
+    """
+    return _is_zero(_tangent, conic.a, conic.b, conic.c, conic.d, conic.e,
+                    conic.f, line.a, line.b, line.c)
+
+def collinear(point1, point2, point3):
+    """
+    Check whether three points lie on a line, from the determinant of
+    [[x1, y1, 1], [x2, y2, 1], [x3, y3, 1]].
+    """
+    return _is_zero(_collinear, point1.x, point1.y, point2.x, point2.y,
+                    point3.x, point3.y)
+
+def concurrent(line1, line2, line3):
+    """
+    Check whether three lines meet at a point, from the determinant of their
+    coefficients. As in the projective plane, three parallel lines are
+    concurrent at a point at infinity.
+    """
+    return _is_zero(_concurrent, line1.a, line1.b, line1.c,
+                    line2.a, line2.b, line2.c, line3.a, line3.b, line3.c)
@@ -0,0 +1,226 @@
+"""
+This module provides points and lines in homogeneous coordinates.
+
+A ProjectivePoint (x:y:z) represents the affine point [x/z, y/z], and a
+ProjectiveLine (a:b:c) the line a*x + b*y + c = 0. Joins and meets are cross
+products, and equality and incidence are tested without division, so
+constructions can be chained without computing any inverses. Coordinates
+are only normalised when a caller asks for an affine Point or Line, or for a
+hash.
+
+Points with z == 0 are points at infinity, so two parallel lines still meet,
+and the line (0:0:1) is the line at infinity.
+"""
+
+from pygeom.core import Core, Point, Line
+from pygeom.util import check_geometry, NullLineError
+
+def _cross(u, v):
+    """
+    The cross product of two 3-vectors.
+    """
+    u1, u2, u3 = u
+    v1, v2, v3 = v
+    return u2*v3 - u3*v2, u3*v1 - u1*v3, u1*v2 - u2*v1
+
+def _proportional(u, v):
+    """
+    Boolean function to check if two 3-vectors are scalar multiples of each
+    other.
+    """
+    u1, u2, u3 = u
+    v1, v2, v3 = v
+    return u1*v2 == u2*v1 and u1*v3 == u3*v1 and u2*v3 == u3*v2
+
+
+class _Projective(Core):
+    """
+    Base class for homogeneous triples, which are equal when they are
+    proportional.
+    """
+
+    def __init__(self, u, v, w, geometry=None):
+        if u == 0 and v == 0 and w == 0:
+            raise ValueError, \
+                "(0:0:0) does not represent a %s" % self.__class__.__name__
+        Core.__init__(self, geometry)
+
+    def canonical_form(self):
+        """
+        Return the coordinates scaled to the field's canonical representative
+        of their ratio.
+        """
+        u, v, w = self.form()
+        return tuple(u.reduce([v, w]))
+
+    def __eq__(self, other):
+        if other is self:
+            return True
+        return bool(self.__class__ == other.__class__ and
+                    _proportional(self.form(), other.form()) and
+                    self.geometry == other.geometry)
+
+
+class ProjectivePoint(_Projective):
+    """
+    A point (x:y:z) of the projective plane.
+    """
+
+    def __init__(self, x, y, z, geometry=None):
+        self.x = x
+        self.y = y
+        self.z = z
+        _Projective.__init__(self, x, y, z, geometry)
+
+    @classmethod
+    def from_affine(cls, point):
+        """
+        Create the projective point (x:y:1) from the affine Point [x, y].
+        """
+        return cls(point.x, point.y, point.x*0 + 1, point.geometry)
+
+    def form(self):
+        """
+        Return a tuple representation of the object.
+        """
+        return self.x, self.y, self.z
+
+    def __repr__(self):
+        return "(%s:%s:%s)" % (str(self.x), str(self.y), str(self.z))
+
+    def at_infinity(self):
+        """
+        Boolean function to check if this is a point at infinity.
+        """
+        return self.z == 0
+
+    def affine(self):
+        """
+        Return the affine Point [x/z, y/z]. A ValueError is raised for points
+        at infinity.
+        """
+        if self.at_infinity():
+            raise ValueError, "%s is a point at infinity" % str(self)
+        return Point(self.x/self.z, self.y/self.z, self.geometry)
+
+    @check_geometry
+    def join(self, other):
+        """
+        Return the line through this point and another. A ValueError is
+        raised if the points are the same.
+        """
+        return ProjectiveLine(*_cross(self.form(), other.form()),
+                              geometry=self.geometry)
+
+    def on(self, line):
+        """
+        Boolean function to check if this point lies on a line.
+        """
+        return line.through(self)
+
+    @check_geometry
+    def quadrance(self, other):
+        """
+        The quadrance between this point and another. Both points must be
+        finite.
+        """
+        x1, y1, z1 = self.form()
+        x2, y2, z2 = other.form()
+        if z1 == 0 or z2 == 0:
+            raise ValueError, "Quadrance is not defined for points at infinity"
+        dx, dy = x1*z2 - x2*z1, y1*z2 - y2*z1
+        mx, my = self.geometry.apply(dx, dy)
+        zz = z1*z2
+        return (dx*mx + dy*my)/(zz*zz)
+
+
+class ProjectiveLine(_Projective):
+    """
+    A line (a:b:c) of the projective plane, a*x + b*y + c*z = 0.
+    """
+
+    def __init__(self, a, b, c, geometry=None):
+        self.a = a
+        self.b = b
+        self.c = c
+        _Projective.__init__(self, a, b, c, geometry)
+
+    @classmethod
+    def from_affine(cls, line):
+        """
+        Create the projective line (a:b:c) from the affine Line.
+        """
+        return cls(line.a, line.b, line.c, line.geometry)
+
+    def form(self):
+        """
+        Return a tuple representation of the object.
+        """
+        return self.a, self.b, self.c
+
+    def __repr__(self):
+        return "<%s:%s:%s>" % (str(self.a), str(self.b), str(self.c))
+
+    def eval(self, x, y):
+        """
+        Evaluate whether the given x, y coordinates "match this object".
+
+        In this case check whether the affine point is on the line.
+        """
+        return self.a*x + self.b*y + self.c
+
+    def at_infinity(self):
+        """
+        Boolean function to check if this is the line at infinity.
+        """
+        return self.a == 0 and self.b == 0
+
+    def affine(self):
+        """
+        Return the affine Line. A ValueError is raised for the line at
+        infinity.
+        """
+        if self.at_infinity():
+            raise ValueError, "%s is the line at infinity" % str(self)
+        return Line(self.a, self.b, self.c, self.geometry)
+
+    def through(self, point):
+        """
+        Boolean function to check if this line passes through a point.
+        """
+        return self.a*point.x + self.b*point.y + self.c*point.z == 0
+
+    @check_geometry
+    def meet(self, other):
+        """
+        Return the point where this line meets another. Parallel lines meet
+        at a point at infinity. A ValueError is raised if the lines are the
+        same.
+        """
+        return ProjectivePoint(*_cross(self.form(), other.form()),
+                               geometry=self.geometry)
+
+    @check_geometry
+    def parallel(self, other):
+        """
+        Boolean function to determine if two lines are parallel.
+        """
+        return self.a*other.b - other.a*self.b == 0
+
+    @check_geometry
+    def spread(self, other):
+        """
+        Calculate the spread between this line and another, using a single
+        division. As for Vertex.spread(), a NullLineError is raised if it is
+        undefined because both lines are null, and a ZeroDivisionError if
+        only one is.
+        """
+        mx, my = self.geometry.apply(-self.b, self.a)
+        nx, ny = self.geometry.apply(-other.b, other.a)
+        num = -other.b*mx + other.a*my
+        den = (-self.b*mx + self.a*my)*(-other.b*nx + other.a*ny)
+        if den == 0:
+            if num == 0:
+                raise NullLineError
+            raise ZeroDivisionError
+        return (den - num*num)/den
@@ -0,0 +1,268 @@
+"""
+This module describes the projective plane PG(2, p) over GF(p) by a Singer
+difference set.
+
+If t generates the multiplicative group of GF(p^3), then the N = p^2 + p + 1
+powers t^0, ..., t^(N-1) represent every point of the plane exactly once, as
+vectors over GF(p) up to scalar multiples. Multiplication by t permutes the
+points and lines cyclically, so if D is the set of points i on the line
+t^2-coefficient == 0, then line j consists of the points D + j (mod N). D has
+p + 1 elements and every non-zero difference modulo N occurs exactly once
+between its elements.
+
+The whole plane is therefore described by O(p) integers. Point i lies on line
+j exactly when i - j is in D.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from pygeom.core import Point, Line
+from pygeom.util import factorize, inverse, isqrt
+
+def _mat_mul(A, B, p):
+    """
+    Multiply two 3x3 matrices, given as tuples of rows, modulo p.
+    """
+    return tuple([tuple([sum([A[i][k]*B[k][j] for k in range(3)]) % p
+                         for j in range(3)]) for i in range(3)])
+
+def _mat_pow(A, e, p):
+    """
+    Raise a 3x3 matrix to a non-negative power modulo p.
+    """
+    result = ((1, 0, 0), (0, 1, 0), (0, 0, 1))
+    while e:
+        if e & 1:
+            result = _mat_mul(result, A, p)
+        A = _mat_mul(A, A, p)
+        e >>= 1
+    return result
+
+def _mat_vec(A, v, p):
+    """
+    Multiply a 3x3 matrix by a vector modulo p.
+    """
+    return tuple([sum([A[i][k]*v[k] for k in range(3)]) % p for i in range(3)])
+
+def _normalize(v, p):
+    """
+    Scale a non-zero vector modulo p so that its last non-zero entry is 1.
+    """
+    for x in reversed(v):
+        if x % p:
+            k = inverse(x, p)
+            return tuple([y*k % p for y in v])
+    raise ValueError, "The zero vector is not a projective point"
+
+def _companion(c0, c1, c2):
+    """
+    The matrix of multiplication by t on GF(p)[t]/(t^3 - c2*t^2 - c1*t - c0)
+    in the basis 1, t, t^2.
+    """
+    return ((0, 0, c0), (1, 0, c1), (0, 1, c2))
+
+def primitive_cubic(p):
+    """
+    Return the coefficients (c0, c1, c2) of the first (in lexicographic
+    order of (c0, c1, c2)) polynomial t^3 - c2*t^2 - c1*t - c0 over GF(p) for
+    which t generates the multiplicative group of GF(p^3).
+    """
+    order = p**3 - 1
+    factors = sorted(set(factorize(p - 1) + factorize(p*p + p + 1)))
+    e1 = (1, 0, 0)
+    for c0 in range(1, p):
+        # c0 is the norm of t, which must generate the multiplicative group
+        # of GF(p).
+        if p > 2 and False in [pow(c0, (p - 1)/q, p) != 1
+                               for q in factorize(p - 1)]:
+            continue
+        for c1 in range(p):
+            for c2 in range(p):
+                C = _companion(c0, c1, c2)
+                if _mat_vec(_mat_pow(C, order, p), e1, p) != e1:
+                    continue
+                if False not in [_mat_vec(_mat_pow(C, order/q, p), e1, p) != e1
+                                 for q in factors]:
+                    return c0, c1, c2
+    raise ValueError, "No primitive cubic modulo %d" % p
+
+
+class SingerPlane(object):
+    """
+    The projective plane over GF(p), with N = p^2 + p + 1 points and lines
+    numbered 0 to N - 1 along a Singer cycle.
+
+    Incidence is a set lookup, the points on a line and the lines through a
+    point are translates of the difference set, and joins and meets are O(p)
+    vectorised scans of it. Only O(p) memory is used, so this works at primes
+    where tables of size p^2 are too big. Building the difference set takes
+    O(p^2) vectorised steps.
+    """
+
+    def __init__(self, field, geometry=None):
+        if np is None:
+            raise ImportError, "SingerPlane requires numpy"
+        self.field = field
+        self.geometry = geometry
+        self.base = p = field.base
+        self.order = N = p*p + p + 1
+        self.polynomial = primitive_cubic(p)
+        self._matrix = _companion(*self.polynomial)
+
+        self.difference_set = self._difference_set()
+        self._differences = frozenset(self.difference_set.tolist())
+        self._baby_steps = None
+
+    def __repr__(self):
+        return "SingerPlane(GF(%d))" % self.base
+
+    def _difference_set(self):
+        """
+        Find the exponents i < N for which t^i has no t^2 term, stepping
+        through the powers of t in blocks of about p.
+        """
+        p, N = self.base, self.order
+        block = min(N, p + 1)
+
+        powers = np.zeros((block, 3), dtype=np.int64)
+        v = (1, 0, 0)
+        for i in range(block):
+            powers[i] = v
+            v = _mat_vec(self._matrix, v, p)
+        step = np.array(_mat_pow(self._matrix, block, p), dtype=np.int64)
+
+        found = []
+        for offset in range(0, N, block):
+            indices = np.nonzero(powers[:, 2] == 0)[0] + offset
+            found.append(indices[indices < N])
+            powers = powers.dot(step.T) % p
+        return np.concatenate(found)
+
+    def vector(self, i):
+        """
+        Return homogeneous coordinates (x, y, z) of the point numbered i.
+        """
+        return _mat_vec(_mat_pow(self._matrix, i % self.order, self.base),
+                        (1, 0, 0), self.base)
+
+    def line_vector(self, j):
+        """
+        Return the coefficients (a, b, c) of the line numbered j, so that the
+        point (x, y, z) is on it when a*x + b*y + c*z == 0.
+        """
+        inverse_power = _mat_pow(self._matrix, -j % self.order, self.base)
+        return inverse_power[2]
+
+    def on(self, i, j):
+        """
+        Boolean function to check whether point i lies on line j.
+        """
+        return (i - j) % self.order in self._differences
+
+    def points_on(self, j):
+        """
+        Return an array of the p + 1 points on line j.
+        """
+        return (self.difference_set + j) % self.order
+
+    def lines_through(self, i):
+        """
+        Return an array of the p + 1 lines through point i.
+        """
+        return (i - self.difference_set) % self.order
+
+    def _difference(self, d):
+        """
+        Return the element a of the difference set for which a - d is also
+        in it.
+        """
+        D, N = self.difference_set, self.order
+        if d % N == 0:
+            raise ValueError, "Two distinct points or lines are needed"
+        # D is sorted, so look up every a - d in it at once
+        shifted = (D - d) % N
+        found = D[np.searchsorted(D, shifted) % len(D)] == shifted
+        return int(D[found.argmax()])
+
+    def join(self, i1, i2):
+        """
+        Return the line through points i1 and i2.
+        """
+        return (i1 - self._difference(i1 - i2)) % self.order
+
+    def meet(self, j1, j2):
+        """
+        Return the point where lines j1 and j2 meet. In the projective plane
+        this always exists.
+        """
+        return (j1 + self._difference(j2 - j1)) % self.order
+
+    def index(self, vector):
+        """
+        Return the number of the point with homogeneous coordinates
+        (x, y, z), using baby-step giant-step in O(p) time.
+        """
+        p, N = self.base, self.order
+        m = isqrt(N - 1) + 1
+        if self._baby_steps is None:
+            baby_steps = {}
+            v = (1, 0, 0)
+            for j in range(m):
+                baby_steps.setdefault(_normalize(v, p), j)
+                v = _mat_vec(self._matrix, v, p)
+            self._baby_steps = baby_steps, _mat_pow(self._matrix, N - m, p)
+        baby_steps, giant_step = self._baby_steps
+
+        v = tuple([int(x) % p for x in vector])
+        for k in range(m):
+            j = baby_steps.get(_normalize(v, p))
+            if j is not None:
+                return (k*m + j) % N
+            v = _mat_vec(giant_step, v, p)
+        raise ValueError, "No point with coordinates %s" % str(vector)
+
+    def point(self, i):
+        """
+        Return point i as an affine Point. A ValueError is raised for points
+        at infinity.
+        """
+        x, y, z = self.vector(i)
+        if z == 0:
+            raise ValueError, "Point %d is at infinity" % i
+        k = inverse(z, self.base)
+        return Point(self.field(x*k), self.field(y*k), self.geometry)
+
+    def line(self, j):
+        """
+        Return line j as an affine Line. A ValueError is raised for the line
+        at infinity.
+        """
+        a, b, c = self.line_vector(j)
+        if a == 0 and b == 0:
+            raise ValueError, "Line %d is the line at infinity" % j
+        return Line(self.field(a), self.field(b), self.field(c), self.geometry)
+
+    def point_index(self, point):
+        """
+        Return the number of an affine Point.
+        """
+        return self.index((point.x.value, point.y.value, 1))
+
+    def line_index(self, line):
+        """
+        Return the number of an affine Line, by joining two of its points.
+        """
+        p = self.base
+        a, b, c = [x.value % p for x in line.form()]
+        if b:
+            k = inverse(b, p)
+            v1, v2 = (0, -c*k, 1), (1, -(a + c)*k, 1)
+        elif a:
+            k = inverse(a, p)
+            v1, v2 = (-c*k, 0, 1), (-c*k, 1, 1)
+        else:
+            raise ValueError, "%s is not a line of the plane" % str(line)
+        return self.join(self.index(v1), self.index(v2))
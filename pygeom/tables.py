@@ -0,0 +1,288 @@
+"""
+Precomputed metric tables for geometries over small finite fields.
+
+Over GF(p) there are only p + 1 directions of lines, so the spread between
+two lines depends only on their two directions and the geometry. Likewise
+there are only p^2 vectors, so the points at a given quadrance from any point
+are a translate of one fixed set of vectors. The tables here are built once
+per geometry, the first time they are needed, and are then shared by all
+threads. They are opt-in, and are enabled with enable_spread_tables() and
+enable_quadrance_tables().
+"""
+
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from pygeom.core import Point, Line, PointSet
+from pygeom.field import FiniteField, FieldArray, _pow_mod
+from pygeom.util import inverse, NullLineError
+
+SPREAD_TABLE_LIMIT = 2**11
+QUADRANCE_TABLE_LIMIT = 2**11
+
+# Table entries for pairs of lines whose spread is not defined: both the
+# numerator and denominator of the spread are zero (Vertex.spread raises
+# NullLineError), or only the denominator is (it raises ZeroDivisionError).
+NULL = -1
+UNDEFINED = -2
+
+_lock = threading.Lock()
+
+def enable_spread_tables():
+    """
+    Use spread tables for Vertex.spread, Vertex.perpendicular and
+    PointLine.construct_spread in geometries over finite fields with at most
+    SPREAD_TABLE_LIMIT elements.
+    """
+    SpreadTable.enabled = True
+
+def disable_spread_tables():
+    """
+    Stop using spread tables, and discard those which have been built.
+    """
+    SpreadTable.disable()
+
+def enable_quadrance_tables():
+    """
+    Use quadrance tables for PointLine.construct_quadrance in geometries over
+    finite fields with at most QUADRANCE_TABLE_LIMIT elements.
+    """
+    QuadranceTable.enabled = True
+
+def disable_quadrance_tables():
+    """
+    Stop using quadrance tables, and discard those which have been built.
+    """
+    QuadranceTable.disable()
+
+
+class _GeometryTable(object):
+    """
+    Base class for tables which are built once per geometry over GF(p), for
+    p no bigger than the class's limit.
+    """
+
+    enabled = False
+    limit = None
+
+    @classmethod
+    def get(cls, geometry):
+        """
+        Return the shared table for a geometry, building it on first use.
+        None is returned if tables are disabled or can't be used for the
+        geometry.
+        """
+        if not cls.enabled:
+            return None
+        table = cls._tables.get(geometry)
+        if table is None:
+            a = geometry.form[0]
+            if a.__class__ is not FiniteField or np is None or \
+                    a._base > cls.limit:
+                return None
+            with _lock:
+                table = cls._tables.get(geometry)
+                if table is None:
+                    table = cls(geometry)
+                    cls._tables[geometry] = table
+        return table
+
+    @classmethod
+    def disable(cls):
+        """
+        Stop using this kind of table, and discard those which have been
+        built.
+        """
+        cls.enabled = False
+        with _lock:
+            cls._tables.clear()
+
+
+class SpreadTable(_GeometryTable):
+    """
+    The spreads between all p + 1 directions of lines in a geometry over
+    GF(p), with an index from a direction and a spread to the directions
+    which make that spread with it.
+
+    The line a*x + b*y + c = 0 has direction a/b if b != 0, and p otherwise.
+    """
+
+    _tables = {}
+    limit = SPREAD_TABLE_LIMIT
+
+    def __init__(self, geometry):
+        a, b, c = [x.value for x in geometry.form]
+        self.geometry = geometry
+        self.base = p = geometry.form[0]._base
+
+        # The vector (-b, a) of the line with each direction, as (u, v)
+        u = np.append(np.full(p, -1, dtype=np.int64), 0) % p
+        v = np.append(np.arange(p, dtype=np.int64), 1)
+        mu, mv = (a*u + b*v) % p, (b*u + c*v) % p
+        norms = (u*mu + v*mv) % p
+
+        dots = (np.outer(u, mu) + np.outer(v, mv)) % p
+        num = dots*dots % p
+        den = np.outer(norms, norms) % p
+        den_inverse = _pow_mod(den, p - 2, p)
+        spreads = (den - num) % p * den_inverse % p
+        spreads[den == 0] = UNDEFINED
+        spreads[(den == 0) & (num == 0)] = NULL
+        self.spreads = spreads
+
+        # For each direction, a dictionary from spreads to the directions
+        # which make them with it, built when the direction is first used.
+        self._index = {}
+
+    def direction(self, line):
+        """
+        Return the direction of a line, or None if a == b == 0.
+        """
+        p = self.base
+        a, b = line.a.value % p, line.b.value % p
+        if b:
+            return a*inverse(b, p) % p
+        if a:
+            return p
+        return None
+
+    def spread(self, line1, line2):
+        """
+        Return the spread between two lines, raising the same errors as
+        Vertex.spread() where it is not defined.
+        """
+        d1, d2 = self.direction(line1), self.direction(line2)
+        if d1 is None or d2 is None:
+            raise NullLineError
+        spread = self.spreads[d1, d2]
+        if spread == NULL:
+            raise NullLineError
+        if spread == UNDEFINED:
+            raise ZeroDivisionError
+        return line1.a._new(int(spread))
+
+    def directions(self, direction, spread):
+        """
+        Return a tuple of the directions which make the given spread with a
+        direction.
+        """
+        index = self._index.get(direction)
+        if index is None:
+            index = {}
+            for other, value in enumerate(self.spreads[direction].tolist()):
+                index[value] = index.get(value, ()) + (other,)
+            self._index[direction] = index
+        return index.get(spread, ())
+
+    def spread_lines(self, point, line, spread):
+        """
+        Return the two lines through a point which make a given spread with a
+        non-null line, as PointLine.construct_spread() does. The two lines are
+        the same if there is only one. A ValueError is raised if there are
+        none. None is returned if more than two directions qualify, when the
+        quadratic solved by construct_spread vanishes identically.
+        """
+        p = self.base
+        direction = self.direction(line)
+        spread = int(getattr(spread, "value", spread)) % p
+        # The roots of the quadratic solved by construct_spread also include
+        # null directions perpendicular to the line.
+        directions = (self.directions(direction, spread) +
+                      self.directions(direction, NULL))
+        if len(directions) > 2:
+            return None
+        if len(directions) == 0:
+            raise ValueError, "No line makes a spread of %s with %s" % \
+                (str(spread), str(line))
+        x, y = point.x, point.y
+        lines = []
+        for d in directions:
+            if d == p:
+                lines.append(Line(x._new(1), x._new(0), -x, line.geometry))
+            else:
+                lines.append(Line(x._new(d), x._new(1), -(d*x + y),
+                                  line.geometry))
+        return lines[0], lines[-1]
+
+
+class QuadranceTable(_GeometryTable):
+    """
+    The quadrances of all p^2 vectors in a geometry over GF(p), with an
+    index from each quadrance to its level set: the vectors [u, v] with that
+    quadrance.
+
+    The points at quadrance q from a point are the level set of q translated
+    to it, so circles are enumerated without searching the plane.
+    """
+
+    _tables = {}
+    limit = QUADRANCE_TABLE_LIMIT
+
+    def __init__(self, geometry):
+        a, b, c = [x.value for x in geometry.form]
+        self.geometry = geometry
+        self.base = p = geometry.form[0]._base
+
+        ids = np.arange(p*p, dtype=np.int64)
+        u, v = ids // p, ids % p
+        norms = (a*u*u + 2*b*u*v + c*v*v) % p
+
+        # The vector IDs u*p + v, grouped by quadrance, with the level set of
+        # q in _order[_starts[q]:_starts[q + 1]]
+        self._order = np.argsort(norms, kind="mergesort")
+        self._starts = np.searchsorted(norms[self._order],
+                                       np.arange(p + 1, dtype=np.int64))
+
+    def _value(self, quadrance):
+        """
+        Return a quadrance as an integer modulo p.
+        """
+        return int(getattr(quadrance, "value", quadrance)) % self.base
+
+    def vectors(self, quadrance):
+        """
+        Return the level set of a quadrance as a pair of integer arrays
+        (us, vs).
+        """
+        q = self._value(quadrance)
+        ids = self._order[self._starts[q]:self._starts[q + 1]]
+        return ids // self.base, ids % self.base
+
+    def circle(self, centre, quadrance):
+        """
+        Return the points at a given quadrance from a centre, as a PointSet.
+        """
+        p = self.base
+        us, vs = self.vectors(quadrance)
+        return PointSet(FieldArray((centre.x.value + us) % p, p),
+                        FieldArray((centre.y.value + vs) % p, p),
+                        self.geometry)
+
+    def quadrance_points(self, point, line, quadrance):
+        """
+        Return the two points on a line which are a given quadrance from a
+        point, as PointLine.construct_quadrance() does. The two points are
+        the same if there is only one. A ValueError is raised if there are
+        none, or if the whole line qualifies.
+        """
+        p = self.base
+        a, b, c = [x.value % p for x in line.form()]
+        x, y = point.x.value % p, point.y.value % p
+        if a == 0 and b == 0:
+            raise ValueError, "%s is not a line" % str(line)
+
+        # [x + u, y + v] is on the line when a*u + b*v + (a*x + b*y + c) == 0
+        us, vs = self.vectors(quadrance)
+        found = np.nonzero((a*us + b*vs + (a*x + b*y + c)) % p == 0)[0]
+        if len(found) == 0 or len(found) > 2:
+            raise ValueError, \
+                "No unique points on %s at a quadrance of %s from %s" % \
+                (str(line), str(quadrance), str(point))
+        new = point.x._new
+        points = [Point(new((x + int(us[i])) % p), new((y + int(vs[i])) % p),
+                        self.geometry) for i in found]
+        return points[0], points[-1]
@@ -1,3 +1,8 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
 def egcd(a, b):
     """
     Perform the extended euler algorithm to find, x, y, g such that x*a + y*b = g
@@ -13,11 +18,17 @@ def egcd(a, b):
         a, b = b, a - q * b
     return u, v, a
 
-def gcd(a, b):
-    """
-    Calculate the greatest common divisor of two integers a and b.
-    """
-    return egcd(a, b)[2]
+try:
+    from math import gcd
+except ImportError:
+    def gcd(a, b):
+        """
+        Calculate the greatest common divisor of two integers a and b. The
+        result is never negative.
+        """
+        while b:
+            a, b = b, a % b
+        return abs(a)
 
 def inverse(a, p):
     """
@@ -27,130 +38,522 @@ def inverse(a, p):
         raise ZeroDivisionError
     return egcd(a, p)[0]
 
-def isqrt(n):
+def factorize(n):
+    """
+    Return the distinct prime factors of the positive integer n, in
+    increasing order, using trial division.
+    """
+    factors = []
+    d = 2
+    while d*d <= n:
+        if n % d == 0:
+            factors.append(d)
+            while n % d == 0:
+                n /= d
+        d += 1
+    if n > 1:
+        factors.append(n)
+    return factors
+
+def primitive_root(p):
+    """
+    Return the smallest generator of the multiplicative group of integers
+    modulo the prime p.
+    """
+    if p == 2:
+        return 1
+    factors = factorize(p - 1)
+    g = 2
+    while True:
+        if False not in [pow(g, (p - 1)/q, p) != 1 for q in factors]:
+            return g
+        g += 1
+
+try:
+    from math import isqrt
+except ImportError:
+    def isqrt(n):
+        """
+        Integer square root
+
+        Uses Newton's method as described at:
+        http://en.wikipedia.org/wiki/Integer_square_root
+
+        The iteration starts from the power of two just above the root, found
+        from the bit length of n, so it converges in O(log log n) steps.
+        """
+        if n < 0:
+            raise ValueError, "isqrt() argument must be nonnegative"
+        if n == 0:
+            return 0
+        xn = 1 << ((n.bit_length() + 1) >> 1)
+        while True:
+            xn1 = (xn + n/xn) >> 1
+            if xn1 >= xn:
+                return xn
+            xn = xn1
+
+def _square_mask(modulus):
+    """
+    Return a bitmask with bit r set for each square r modulo the modulus.
     """
-    Integer square root
+    return sum([1 << r for r in set([x*x % modulus for x in range(modulus)])])
 
-    Uses the integer square root algorithm described at:
-    http://en.wikipedia.org/wiki/Integer_square_root
-    """    
-    xn = 1
-    xn1 = (xn + n/xn)/2
-    while abs(xn1 - xn) > 1:
-        xn = xn1
-        xn1 = (xn + n/xn)/2
-    while xn1*xn1 > n:
-        xn1 -= 1
-    return xn1
+# Bitmasks of the squares modulo a few small numbers. Fewer than 1% of
+# integers are squares modulo all of them.
+_SQUARE_MASKS = tuple((m, _square_mask(m)) for m in (64, 63, 65, 11))
+
+def exact_sqrt(n):
+    """
+    Return the integer square root of n if n is a perfect square, and None
+    otherwise.
+
+    Most non-squares are rejected by checking that n is a square modulo 64,
+    63, 65 and 11, before any root is extracted.
+    """
+    if n < 0:
+        return None
+    for modulus, mask in _SQUARE_MASKS:
+        if not (mask >> (n % modulus)) & 1:
+            return None
+    root = isqrt(n)
+    if root*root == n:
+        return root
+    return None
 
 def is_square(n):
     """
     Check whether an integer is a square root.
     """
-    return n >= 0 and isqrt(n)**2 == n
+    return exact_sqrt(n) is not None
+
+def legendre(a, p):
+    """
+    Calculate the Legendre symbol (a/p) for an odd prime p using Euler's
+    criterion: 1 if a is a non-zero square mod p, -1 if it is not a square
+    and 0 if p divides a.
+    """
+    symbol = pow(a, (p - 1)/2, p)
+    if symbol == p - 1:
+        return -1
+    return symbol
+
+def jacobi(a, n):
+    """
+    Calculate the Jacobi symbol (a/n) for an odd positive integer n.
+
+    This uses quadratic reciprocity rather than exponentiation, so takes
+    O(log n) steps. When n is prime this is the Legendre symbol.
+    """
+    if n <= 0 or n % 2 == 0:
+        raise ValueError, "n must be an odd positive integer (%s)" % str(n)
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a /= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    if n == 1:
+        return result
+    return 0
+
+# Primes below this limit have their quadratic residues cached as a bitmap.
+QR_BITMAP_LIMIT = 2**16
+
+_QR_BITMAPS = {}
+
+def quadratic_residues(p):
+    """
+    Return a bitmap of the squares modulo p, as a bytearray in which bit
+    (n & 7) of byte (n >> 3) is set if n is a square. Bitmaps for primes below
+    QR_BITMAP_LIMIT are cached.
+    """
+    bitmap = _QR_BITMAPS.get(p)
+    if bitmap is None:
+        bitmap = bytearray((p + 7)/8)
+        for x in range(p/2 + 1):
+            n = x*x % p
+            bitmap[n >> 3] |= 1 << (n & 7)
+        if p < QR_BITMAP_LIMIT:
+            _QR_BITMAPS[p] = bitmap
+    return bitmap
+
+def is_quadratic_residue(n, p):
+    """
+    Check whether n is a square modulo the prime p. Zero counts as a square.
+    """
+    n %= p
+    if p == 2 or n == 0:
+        return True
+    if p < QR_BITMAP_LIMIT:
+        return bool(quadratic_residues(p)[n >> 3] & (1 << (n & 7)))
+    return jacobi(n, p) == 1
+
+_SHANKS_TONELLI = {}
+
+def _shanks_tonelli_params(p):
+    """
+    Return the tuple (Q, S, W, V) for the odd prime p, where p - 1 = Q*2^S with
+    Q odd, W is a quadratic nonresidue of p and V = W^Q (mod p). The values
+    only depend on p, so are cached.
+    """
+    params = _SHANKS_TONELLI.get(p)
+    if params is None:
+        Q = p - 1
+        S = 0
+        while Q % 2 == 0:
+            S += 1
+            Q /= 2
+        W = 2
+        while legendre(W, p) != -1:
+            W += 1
+        params = Q, S, W, pow(W, Q, p)
+        _SHANKS_TONELLI[p] = params
+    return params
 
 def shanks_tonelli(n, p):
     """
     For a given n solve x^2 = n (mod p), where p is an odd prime and n is a
-    quadratic residue of p
+    quadratic residue of p. Raises ValueError if n is not a residue.
 
     Reference: http://planetmath.org/encyclopedia/ShanksTonelliAlgorithm.html
+
+    The inner loop takes O(S^2) multiplications where p - 1 = Q*2^S, so for
+    primes with a large power of two in p - 1 Cipolla's method is used instead.
     """
     # pylint: disable-msg=C0103
-    
-    if n == 0:
-        return 0
+    n %= p
+    if n == 0 or p == 2:
+        return n
+
+    Q, S, _, V = _shanks_tonelli_params(p)
+    if S*S > 8*p.bit_length():
+        return cipolla(n, p)
 
-    # 1. First find positive integers Q and S such that
-    # p - 1 = (2^S)*Q, where Q is odd. 
+    # R = n^((Q+1)/2) is a root of n*t, where t = n^Q lies in the subgroup of
+    # order 2^S. Each pass multiplies R by a power of V to reduce the order of
+    # t until t = 1.
+    R = pow(n, (Q + 1)/2, p)
+    t = pow(n, Q, p)
+    c = V
+    M = S
+    while t != 1:
+        # Find the smallest i such that t^(2^i) = 1 (mod p)
+        i = 0
+        tt = t
+        while tt != 1:
+            tt = tt*tt % p
+            i += 1
+            if i == M:
+                raise ValueError, "%d is not a square mod %d" % (n, p)
 
-    Q = p - 1
-    S = 0
-    while Q % 2 == 0:
-        S += 1
-        Q /= 2
+        b = pow(c, 1 << (M - i - 1), p)
+        R = R*b % p
+        c = b*b % p
+        t = t*c % p
+        M = i
 
-    assert Q * 2**S == p - 1
-    assert Q % 2 == 1
+    return R
 
-    # 2. Then find a quadratic nonresidue W of p and compute V = W^Q(modp) 
+def cipolla(n, p):
+    """
+    For a given n solve x^2 = n (mod p), where p is an odd prime and n is a
+    quadratic residue of p, using Cipolla's algorithm. Raises ValueError if n
+    is not a residue.
+
+    Reference: http://en.wikipedia.org/wiki/Cipolla's_algorithm
+    """
+    n %= p
+    if n == 0 or p == 2:
+        return n
+    if legendre(n, p) != 1:
+        raise ValueError, "%d is not a square mod %d" % (n, p)
 
-    W = 2
+    # Find a such that w = a^2 - n is a nonresidue.
+    a = 0
     while True:
-        result1 = W**((p-1)/2) % p
-        result = 1
-        for _ in range((p - 1)/2):
-            result *= W
-            result %= p
-        assert result == result1
-        if result != 1:
+        w = (a*a - n) % p
+        if legendre(w, p) == -1:
             break
-        W += 1
+        a += 1
 
-    V = 1
-    for _ in range(Q):
-        V *= W
-        V %= p
+    # Calculate (a + sqrt(w))^((p + 1)/2) in GF(p^2) = GF(p)[sqrt(w)].
+    x1, x2 = 1, 0
+    y1, y2 = a, 1
+    e = (p + 1)/2
+    while e:
+        if e & 1:
+            x1, x2 = (x1*y1 + x2*y2*w) % p, (x1*y2 + x2*y1) % p
+        y1, y2 = (y1*y1 + y2*y2*w) % p, 2*y1*y2 % p
+        e >>= 1
+    return x1
 
-    assert V == W**Q % p
+class GeometryError(Exception): pass
 
-    # 3. Then find an integer n' that is the multiplicative inverse of 
-    # n (mod p) (i.e., n'*n = 1 (mod p) ).
-    nn = inverse(n, p)
+class NullLineError(Exception): pass
 
-    assert (nn * n) % p == 1
-        
-    # 4. Compute R = n^((Q+1/2))(modp)
-    R = 1
-    for _ in range((Q+1)/2):
-        R *= n
-        R %= p
-    assert n**((Q+1)/2) % p == R
+class VerificationError(AssertionError): pass
 
-    while True:
+VERIFY_OFF = "off"
+VERIFY_SAMPLED = "sampled"
+VERIFY_FULL = "full"
 
-        # 5. and find the smallest integer i >= 0 that satisfies 
-        # (R^2*n')^(2^i) = 1 (mod p)
-        i = 0
-        RR = R*R*nn % p
-        while RR != 1:
-            RR *= RR
-            RR %= p
-            i += 1
+_default_verification = (VERIFY_FULL, 1)
 
-        assert (R*R*nn)**(2**i) % p == 1
+_verification = threading.local()
 
-        # 6. If i=0, then x=R, and the algorithm stops. 
-        if i == 0:
-            break
-            
-        # 7. Otherwise, compute R' = R*V^2^(S-i-1) (mod p) and repeat the 
-        # procedure for R = R'.
-        RR = R*(V**(2**(S - i - 1))) % p
-        assert RR % p == R*(V**(2**(S - i - 1))) % p
-        R = RR
-
-    assert R*R % p == n % p
-    return R
+def _check_verification(level, rate):
+    """
+    Check that a verification level and sampling rate are valid.
+    """
+    if level not in (VERIFY_OFF, VERIFY_SAMPLED, VERIFY_FULL):
+        raise ValueError, "Unknown verification level (%s)" % str(level)
+    if type(rate) not in [int, long] or rate < 1:
+        raise ValueError, "Sampling rate must be a positive integer (%s)" % \
+            str(rate)
 
-class GeometryError(Exception): pass
+def get_verification():
+    """
+    Return the (level, rate) verification policy of the current thread.
+    """
+    return getattr(_verification, "policy", _default_verification)
 
-class NullLineError(Exception): pass
+def set_verification(level, rate=1):
+    """
+    Set the verification policy of the current thread.
+
+    Constructions check their own results when the level is VERIFY_FULL,
+    check one call in every rate when it is VERIFY_SAMPLED and never check
+    them when it is VERIFY_OFF.
+    """
+    _check_verification(level, rate)
+    _verification.policy = level, rate
+
+def set_default_verification(level, rate=1):
+    """
+    Set the verification policy used by threads which have not set their
+    own. Initially this is VERIFY_FULL.
+    """
+    global _default_verification
+    _check_verification(level, rate)
+    _default_verification = level, rate
+
+@contextmanager
+def verification(level, rate=1):
+    """
+    A context manager which sets the verification policy of the current
+    thread, and restores the previous policy on exit.
+    """
+    _check_verification(level, rate)
+    previous = getattr(_verification, "policy", None)
+    _verification.policy = level, rate
+    try:
+        yield
+    finally:
+        if previous is None:
+            del _verification.policy
+        else:
+            _verification.policy = previous
+
+def verify(check, message="Self-check failed"):
+    """
+    Run a self-check of a construction, if the verification policy of the
+    current thread asks for it.
+
+    check is a callable which returns True if the result is correct, so that
+    nothing is computed for checks which are skipped. A VerificationError is
+    raised if it returns False.
+    """
+    level, rate = getattr(_verification, "policy", _default_verification)
+    if level == VERIFY_OFF:
+        return
+    if level == VERIFY_SAMPLED:
+        count = getattr(_verification, "count", 0) + 1
+        _verification.count = count
+        if count % rate:
+            return
+    if not check():
+        raise VerificationError, message
+
+DEFAULT_CACHE_SIZE = 1024
+
+class LRUCache(object):
+    """
+    A mapping of bounded size which discards the least recently used entry
+    when it is full, and counts its hits, misses and evictions.
+    """
+
+    def __init__(self, size=DEFAULT_CACHE_SIZE):
+        self.enabled = False
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+        self.resize(size)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Return the value stored for key, marking it as the most recently
+        used. A KeyError is raised if it isn't in the cache.
+        """
+        with self._lock:
+            try:
+                value = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                raise
+            self._entries[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Store a value for key, evicting the least recently used entry if the
+        cache is full.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            self._evict()
+
+    def resize(self, size):
+        """
+        Change the maximum number of entries, evicting entries if needed.
+        """
+        if type(size) not in [int, long] or size < 1:
+            raise ValueError, "Cache size must be a positive integer (%s)" % \
+                str(size)
+        with self._lock:
+            self.size = size
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Remove all of the entries and reset the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Return a dictionary of the hits, misses, evictions, entries and size
+        of the cache.
+        """
+        return {"hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "entries": len(self._entries),
+                "size": self.size}
+
+_MEMOIZED = {}
+
+def memoized(name):
+    """
+    Decorate a function so that its results are stored in an LRUCache
+    registered under the given name, keyed on its arguments. The arguments
+    must be hashable, which core objects and pairs are, on their canonical
+    forms and geometry. Calls with unhashable arguments are not cached.
+
+    Memoization is disabled until it is turned on with enable_memoization().
+    """
+    cache = _MEMOIZED.setdefault(name, LRUCache())
+    def decorator(func):
+        @wraps(func)
+        def _memoized(*args):
+            if not cache.enabled:
+                return func(*args)
+            try:
+                return cache.get(args)
+            except KeyError:
+                pass
+            except TypeError:
+                # Unhashable arguments, or ones which can't be compared
+                return func(*args)
+            result = func(*args)
+            try:
+                cache.put(args, result)
+            except TypeError:
+                pass
+            return result
+        _memoized.cache = cache
+        return _memoized
+    return decorator
+
+def _memoized_caches(name):
+    """
+    Return the caches with the given name, or all of them if it is None.
+    """
+    if name is None:
+        return _MEMOIZED.values()
+    if name not in _MEMOIZED:
+        raise ValueError, "No memoized function named %s" % str(name)
+    return [_MEMOIZED[name]]
+
+def enable_memoization(name=None, size=None):
+    """
+    Turn on memoization for the named function (all of them if not
+    specified), optionally changing the size of the cache.
+    """
+    for cache in _memoized_caches(name):
+        if size is not None:
+            cache.resize(size)
+        cache.enabled = True
+
+def disable_memoization(name=None):
+    """
+    Turn off memoization for the named function (all of them if not
+    specified), discarding the cached results.
+    """
+    for cache in _memoized_caches(name):
+        cache.enabled = False
+        cache.clear()
+
+def memoization_stats(name=None):
+    """
+    Return a dictionary mapping the names of memoized functions (just the
+    given one if specified) to the statistics of their caches.
+    """
+    if name is None:
+        return dict([(key, cache.stats()) for key, cache in _MEMOIZED.items()])
+    return {name: _memoized_caches(name)[0].stats()}
 
 def check_geometry(func):
+    """
+    Decorate a function so that it raises a GeometryError unless all of its
+    arguments which have a geometry share the same one.
+
+    Geometries are interned, so the common case is decided by identity.
+    """
+    @wraps(func)
     def _check_geometry(*items):
-        geometries = [item.geometry for item in items if hasattr(item, "geometry")]
-        if None in geometries:
-            i = geometries.index(None)
-            raise GeometryError, "Object %d (%s) has no geometry." % \
-                (i, items[i])
-        geom0 = geometries[0]
-        equal_geoms = [geom == geom0 for geom in geometries]
-        if False in equal_geoms:
-            i = equal_geoms.index(False)
-            raise GeometryError, \
-                "Object %d (%s) has a different geometry to the first (%s)" % \
-                (i, geometries[i], geom0)
+        geom0 = None
+        for i, item in enumerate(items):
+            try:
+                geom = item.geometry
+            except AttributeError:
+                continue
+            if geom is None:
+                raise GeometryError, "Object %d (%s) has no geometry." % \
+                    (i, item)
+            if geom is geom0:
+                continue
+            if geom0 is None:
+                geom0 = geom
+            elif geom != geom0:
+                raise GeometryError, \
+                    "Object %d (%s) has a different geometry to the first (%s)" % \
+                    (i, geom, geom0)
         return func(*items)
     return _check_geometry
 
@@ -30,7 +30,8 @@ class ObjectLine(object):
         if type(object[0]) == Point:
             label = "(%d, %d): %s " % (object[0].x.value, object[0].y.value, object[1])
         elif type(object[0]) == Line:
-            label = "<%d:%d:%d>: %s " % (object[0].a.value, object[0].b.value, object[0].c.value, object[1])
+            a, b, c = object[0].canonical_form()
+            label = "<%d:%d:%d>: %s " % (a.value, b.value, c.value, object[1])
         else:
             label = "<%d:%d:%d:%d:%d:%d>: %s " % (object[0].a.value, object[0].b.value, object[0].c.value, 
                                                   object[0].d.value, object[0].e.value, object[0].f.value, object[1])
@@ -607,14 +608,7 @@ class FinitePlotWindow(wx.Window):
         self.field = self.parent.object_panel.field
 
         for object, name, marker, color in self.parent.object_panel.get_objects():
-            xs = []
-            ys = []
-            l = object
-            for x in range(self.field.base):
-                for y in range(self.field.base):
-                    if object.eval(x, y) == 0:
-                        xs.append(x)
-                        ys.append(y)
+            xs, ys = object.incidence_points(self.field)
             handles.append(ax.scatter(xs, ys, marker=marker, s=100, color=color))
             labels.append(name)
 
@@ -0,0 +1,226 @@
+"""
+Micro-benchmarks for the performance sensitive parts of pygeom.
+
+Run all of the benchmarks, or just those named on the command line:
+
+    python scripts/benchmark.py [name ...]
+"""
+
+import sys
+import timeit
+
+from pygeom.field import FiniteField, RATIONAL_BACKENDS
+from pygeom.geometry import blue
+from pygeom.core import Point, Line
+from pygeom.pairs import PointLine, LineSegment
+
+BENCHMARKS = []
+
+def benchmark(func):
+    """
+    Register a function as a benchmark.
+    """
+    BENCHMARKS.append(func)
+    return func
+
+def report(label, func, number=1000):
+    """
+    Time func() and print the mean time per call.
+    """
+    seconds = min(timeit.repeat(func, number=number, repeat=3))
+    print "  %-50s %12.3f us" % (label, 1e6*seconds/number)
+
+@benchmark
+def is_square():
+    """
+    FiniteField.is_square() for primes from 7 to 61 bits.
+    """
+    for base in [101, 65521, 1000003, 2**31 - 1, 2**61 - 1]:
+        x = FiniteField(base/3, base)
+        report("is_square, p = %d" % base, x.is_square)
+
+@benchmark
+def sqrt():
+    """
+    FiniteField.sqrt() for primes from 7 to 61 bits.
+    """
+    for base in [101, 65537, 1000003, 998244353, 2**31 - 1, 2**61 - 1]:
+        x = FiniteField(base/3, base)
+        x = x*x
+        report("sqrt, p = %d" % base, x.sqrt)
+
+@benchmark
+def rational():
+    """
+    Rational arithmetic and a conic construction with each rational backend.
+    """
+    for name, field in sorted(RATIONAL_BACKENDS.items()):
+        try:
+            x, y = field(355, 113), field(-22, 7)
+        except ImportError:
+            print "  %s: not available" % name
+            continue
+
+        def arithmetic():
+            z = x
+            for _ in range(20):
+                z = (z*y + x)/(z - y)
+            return z
+
+        geom = blue(field)
+        focus_directrix = PointLine(Point(field(1, 3), field(-2, 5), geom),
+                                    Line(field(3), field(7, 2), field(1), geom))
+        conic = focus_directrix.conic(field(2, 3))
+
+        report("%s: 20 steps of z = (z*y + x)/(z - y)" % name, arithmetic, 100)
+        report("%s: Conic.focus_directrix()" % name, conic.focus_directrix,
+               100)
+
+@benchmark
+def squares():
+    """
+    Perfect square tests and roots of large integers.
+    """
+    from pygeom.util import is_square, isqrt
+    for bits in [64, 256, 1024]:
+        square = (2**bits/3)**2
+        report("is_square, %d bit square" % (2*bits), lambda: is_square(square))
+        report("is_square, %d bit non-square" % (2*bits),
+               lambda: is_square(square + 1))
+        report("isqrt, %d bit" % (2*bits), lambda: isqrt(square))
+
+@benchmark
+def geometry_check():
+    """
+    Overhead of the check_geometry decorator on a three argument method.
+    """
+    from pygeom.util import check_geometry
+    field = FiniteField
+    point1 = Point(field(1), field(2), blue(field))
+    point2 = Point(field(2), field(0), blue(field))
+    line = Line(field(1), field(1), field(1), blue(field))
+    method = check_geometry(lambda *items: None)
+    report("check_geometry, 3 objects", lambda: method(point1, point2, line),
+           100000)
+    report("blue(FiniteField)", lambda: blue(field), 100000)
+
+@benchmark
+def constructions():
+    """
+    Constructions which build intermediate lines, over GF(1009) and Q.
+    """
+    from pygeom.field import Rational
+    from pygeom.util import enable_memoization, disable_memoization
+    from pygeom.tables import enable_spread_tables, disable_spread_tables, \
+        enable_quadrance_tables, disable_quadrance_tables
+    FiniteField.base = 1009
+    for field in [FiniteField, Rational]:
+        geom = blue(field)
+        pl = PointLine(Point(field(3), field(-2), geom),
+                       Line(field(7), field(5), field(1), geom))
+        name = field.__name__
+        report("%s: PointLine.altitude()" % name, pl.altitude, 1000)
+        report("%s: PointLine.construct_spread(1/2)" % name,
+               lambda: pl.construct_spread(field(1)/field(2)), 1000)
+
+        enable_spread_tables()
+        report("%s: PointLine.construct_spread(1/2), tables" % name,
+               lambda: pl.construct_spread(field(1)/field(2)), 1000)
+        disable_spread_tables()
+
+        report("%s: PointLine.construct_quadrance(2)" % name,
+               lambda: pl.construct_quadrance(field(2)), 1000)
+        enable_quadrance_tables()
+        report("%s: PointLine.construct_quadrance(2), tables" % name,
+               lambda: pl.construct_quadrance(field(2)), 1000)
+        disable_quadrance_tables()
+
+        report("%s: PointLine.reflection()" % name, pl.reflection, 1000)
+        report("%s: PointLine.quadrance()" % name, pl.quadrance, 1000)
+        segment = LineSegment(pl.point, Point(field(1), field(4), geom))
+        report("%s: LineSegment.midpoint()" % name, segment.midpoint, 1000)
+
+        enable_memoization("PointLine.altitude")
+        report("%s: PointLine.altitude(), memoized" % name, pl.altitude, 1000)
+        disable_memoization("PointLine.altitude")
+
+@benchmark
+def kernels():
+    """
+    Perpendicular constructions over a set of 10000 points in GF(1009).
+    """
+    from pygeom import kernels
+    from pygeom.core import PointSet
+    from pygeom.field import FieldArray
+    field = FiniteField
+    field.base = 1009
+    geom = blue(field)
+    ids = range(10000)
+    points = PointSet(FieldArray([i % 1009 for i in ids], 1009),
+                      FieldArray([i // 7 for i in ids], 1009), geom)
+    line = Line(field(7), field(5), field(1), geom)
+    report("kernels.foot(PointSet)", lambda: kernels.foot(points, line), 100)
+    report("kernels.quadrance(PointSet)",
+           lambda: kernels.quadrance(points, line), 100)
+
+@benchmark
+def predicates():
+    """
+    Division-free predicates over GF(1009) and Q.
+    """
+    from pygeom import predicates
+    from pygeom.pairs import Vertex
+    field = FiniteField
+    field.base = 1009
+    geom = blue(field)
+    line1 = Line(field(7), field(5), field(1), geom)
+    line2 = Line(field(5), field(-7), field(3), geom)
+    line3 = Line(field(1), field(2), field(3), geom)
+    report("Vertex.perpendicular()", Vertex(line1, line2).perpendicular,
+           10000)
+    report("predicates.concurrent()",
+           lambda: predicates.concurrent(line1, line2, line3), 10000)
+
+    # Rationals with 20 digit numerators and denominators, as produced by
+    # chains of constructions
+    from pygeom.core import Conic
+    from pygeom.field import Rational
+    geom = blue(Rational)
+    values = [Rational(12345678901234567891*i + 7, 98765432109876543211 + i)
+              for i in range(1, 10)]
+    line = Line(values[0], values[1], values[2], geom)
+    conic = Conic(*(values[3:] + [geom]))
+    predicates.disable_filtering()
+    report("Conic.is_tangent(), Rational, exact",
+           lambda: conic.is_tangent(line), 1000)
+    predicates.enable_filtering()
+    report("Conic.is_tangent(), Rational, filtered",
+           lambda: conic.is_tangent(line), 1000)
+
+@benchmark
+def circles():
+    """
+    Enumerating the points of a circle over GF(1009).
+    """
+    from pygeom.tables import QuadranceTable, enable_quadrance_tables, \
+        disable_quadrance_tables
+    field = FiniteField
+    field.base = 1009
+    centre = Point(field(3), field(-2), blue(field))
+    report("Point.circle(5).incidence_points()",
+           lambda: centre.circle(field(5)).incidence_points(field), 10)
+    enable_quadrance_tables()
+    table = QuadranceTable.get(blue(field))
+    report("QuadranceTable.circle()", lambda: table.circle(centre, field(5)),
+           10000)
+    disable_quadrance_tables()
+
+def main(names):
+    for func in BENCHMARKS:
+        if names and func.__name__ not in names:
+            continue
+        print "%s: %s" % (func.__name__, func.__doc__.strip())
+        func()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -43,7 +43,7 @@ def test_fuzz_grammola():
             assert d11 == d1
             assert K22 == K
             assert K11 == K
-            d1.geometry = True
+            d1 = Line(d1.a, d1.b, d1.c)
             assert_raises(GeometryError, grammola.co_diagonal, d1)
 
         except NullLineError:
@@ -1,11 +1,11 @@
 from nose.tools import assert_raises
 
-from pygeom.core import Point, Line, Conic
+from pygeom.core import Point, Line, Conic, PointSet, LineSet
 from pygeom.pairs import LineSegment, Vertex, PointLine
-from pygeom.field import FiniteField, Rational
+from pygeom.field import FiniteField, FieldArray, Rational
 from pygeom.geometry import blue, red, green, Geometry
 from pygeom.util import GeometryError, NullLineError
-from util import random_point, random_line, random_geometry, random_pointline, generate_fuzz_data
+from util import random_point, random_line, random_conic, random_geometry, random_pointline, generate_fuzz_data
 
 
 def test_init():
@@ -108,6 +108,36 @@ def test_eq():
     assert p0g != p1g
     assert p0b != p1b
 
+def test_hash():
+    f = Rational
+    geom = blue(f)
+    p1 = Point(f(1, 2), f(3), geom)
+    p2 = Point(f(2, 4), f(6, 2), geom)
+    p3 = Point(f(1, 2), f(3), red(f))
+    assert p1 == p2 and p1 is not p2
+    assert hash(p1) == hash(p2)
+    assert len(set([p1, p2, p3])) == 2
+
+    l1 = Line(f(2), f(4), f(6), geom)
+    l2 = Line(f(1), f(2), f(3), geom)
+    assert {l1: 1}[l2] == 1
+
+    assert_raises(AttributeError, setattr, p1, "x", f(0))
+    assert_raises(AttributeError, setattr, l1, "geometry", red(f))
+    assert_raises(AttributeError, delattr, p1, "y")
+
+    assert p1.intern() is p1
+    assert p2.intern() is p1
+    assert p3.intern() is p3
+
+    q = Point(f(0), f(1), geom)
+    assert LineSegment(p1, q) == LineSegment(q, p2)
+    assert hash(LineSegment(p1, q)) == hash(LineSegment(q, p2))
+    assert LineSegment(p1, p1) != LineSegment(p1, q)
+    assert len(set([Vertex(l1, LineSegment(p1, q).line),
+                    Vertex(LineSegment(q, p1).line, l2)])) == 1
+    assert len(set([PointLine(p1, l1), PointLine(p2, l2)])) == 1
+
 def test_mul():
     for data in generate_fuzz_data(20, points=1, spreads=1):
         point = data.points[0]
@@ -160,3 +190,82 @@ def test_eval():
 
         assert line.eval(x1, y1) == a*x1 + b*y1 + c
         assert line.eval(x2, y2) == a*x2 + b*y2 + c
+
+def test_field_array_coordinates():
+    f = FiniteField
+    f.base = FieldArray.base = 37
+    for geom in [blue(f), red(f), green(f), random_geometry(f)]:
+        points = [random_point(f, geom) for _ in range(20)]
+        line = random_line(f, geom)
+        xs = FieldArray([point.x for point in points])
+        ys = FieldArray([point.y for point in points])
+        array = Point(xs, ys, geom)
+
+        norms = array.norm()
+        values = line.eval(array.x, array.y)
+        a, b, c = Line(xs, ys, f(1), geom).canonical_form()
+        for i, point in enumerate(points):
+            assert norms[i] == point.norm()
+            assert values[i] == line.eval(point.x, point.y)
+            assert Line(a[i], b[i], c[i], geom) == \
+                Line(point.x, point.y, f(1), geom)
+
+    assert_raises(TypeError, Point, FieldArray([1]), Rational(1))
+
+def test_incidence():
+    f = FiniteField
+    for base in [2, 3, 7, 13, 37]:
+        f.base = base
+        geom = blue(f)
+        objects = ([random_point(f, geom) for _ in range(5)] +
+                   [random_line(f, geom) for _ in range(20)] +
+                   [random_conic(f, geom) for _ in range(20)] +
+                   [Line(f(0), f(0), f(1), geom), Line(f(0), f(0), f(0), geom),
+                    Conic(f(0), f(1), f(0), f(1), f(0), f(0), geom),
+                    Point(f(0), f(0), geom).circle(f(1))])
+        for obj in objects:
+            grid = obj.eval_grid(f)
+            mask = obj.incidence_mask(f)
+            xs, ys = obj.incidence_points(f)
+            assert mask.sum() == len(xs)
+            assert zip(xs, ys) == sorted(zip(xs, ys))
+            for x in range(base):
+                for y in range(base):
+                    on = obj.eval(f(x), f(y)) == 0
+                    assert mask[x, y] == on
+                    assert (grid[x, y] == 0) == on
+
+def test_point_set():
+    f = FiniteField
+    for base in [7, 37]:
+        f.base = base
+        for geom in [blue(f), red(f), green(f), random_geometry(f)]:
+            points = [random_point(f, geom) for _ in range(30)]
+            lines = [random_line(f, geom) for _ in range(30)]
+            point_set = PointSet.from_points(points)
+            line_set = LineSet.from_lines(lines)
+            origin = random_point(f, geom)
+
+            assert len(point_set) == len(line_set) == 30
+            assert list(point_set) == points
+            assert list(line_set) == lines
+            assert point_set[:5] == PointSet.from_points(points[:5])
+            assert line_set[5:] == LineSet.from_lines(lines[5:])
+
+            norms = point_set.norm()
+            nulls = point_set.null()
+            dots = point_set.dot(origin)
+            pair_dots = point_set.dot(point_set - origin)
+            on = point_set.on(lines[0])
+            through = line_set.through(points[0])
+            null_lines = line_set.null()
+            for i, (point, line) in enumerate(zip(points, lines)):
+                assert norms[i] == point.norm()
+                assert nulls[i] == point.null()
+                assert dots[i] == geom.dot(point, origin)
+                assert pair_dots[i] == geom.dot(point, point - origin)
+                assert on[i] == (lines[0].eval(point.x, point.y) == 0)
+                assert through[i] == (line.eval(points[0].x, points[0].y) == 0)
+                assert null_lines[i] == line.null()
+                assert (point_set + origin)[i] == point + origin
+                assert (point_set * f(3))[i] == point * f(3)
@@ -1,8 +1,11 @@
+import copy
+import pickle
+
 import nose
 from nose.tools import assert_raises
 
-from pygeom.field import Field, FiniteField, Rational
-from util import random_finite_fields
+from pygeom.field import Field, FiniteField, FieldArray, Rational
+from util import random_finite_fields, rational_fields
 
 def test_base_class():
     """
@@ -155,6 +158,8 @@ def test_finite_eq():
     assert x == 8
     assert x == -6
     assert x != 2
+    assert hash(x) == hash(1)
+    assert len(set([x, 1])) == 1
 
     # Comparing to strings, floats, etc is always invalid
     assert_raises(TypeError, x.__eq__, 1.0)
@@ -163,7 +168,7 @@ def test_finite_eq():
 
 def test_fuzz_axioms():
 
-    for field in list(random_finite_fields(3)) + [Rational]:
+    for field in list(random_finite_fields(3)) + rational_fields():
         for _ in range(100):
             x, y, z = field.random(), field.random(), field.random()
             zero = field(0)
@@ -214,7 +219,7 @@ def test_fuzz_axioms():
             assert (x + y)*z == x*z + y*z
 
 def test_fuzz_sqrt():
-    for field in list(random_finite_fields(3)) + [Rational]:
+    for field in list(random_finite_fields(3)) + rational_fields():
         for _ in range(100):
             x = field.random()
             if x.is_square():
@@ -225,7 +230,7 @@ def test_fuzz_sqrt():
 
 
 def test_fuzz_reduce():
-    for field in list(random_finite_fields(3)) + [Rational]:
+    for field in list(random_finite_fields(3)) + rational_fields():
         for _ in range(100):
             x, y, z = field.random(), field.random(), field.random()
             x1, y1, z1 = x.reduce([y, z])
@@ -236,3 +241,158 @@ def test_fuzz_reduce():
             x1.reduce([])[0] == x1
             y1.reduce([])[0] == y1
             z1.reduce([])[0] == z1
+
+def test_tables():
+    for base in [2, 3, 7, 13, 37, 101]:
+        tables = FiniteField.enable_tables(base)
+        try:
+            assert FiniteField.enable_tables(base) is tables
+            assert len(set(tables.exp)) == base - 1
+            for x in range(base):
+                assert tables.square[x] == x*x % base
+                root = tables.sqrt[x]
+                if root is None:
+                    assert x not in tables.square
+                else:
+                    assert root*root % base == x
+                if x == 0:
+                    assert tables.inverse[x] is None
+                    assert_raises(ZeroDivisionError, tables.div, 1, x)
+                    continue
+                assert tables.exp[tables.log[x]] == x
+                assert x*tables.inverse[x] % base == 1
+                for y in range(base):
+                    assert tables.mul(x, y) == x*y % base
+                    assert tables.div(y, x)*x % base == y
+        finally:
+            FiniteField.disable_tables(base)
+
+def test_fuzz_tables():
+    for field in random_finite_fields(3):
+        if field is Rational:
+            continue
+        for _ in range(100):
+            x, y = field.random(), field.random()
+            square = x.is_square()
+            quotient = y/x if x != 0 else None
+
+            field.enable_tables()
+            try:
+                assert x.is_square() == square
+                if square:
+                    assert x.sqrt()*x.sqrt() == x
+                else:
+                    assert_raises(ValueError, x.sqrt)
+                if x != 0:
+                    assert y/x == quotient
+                    assert (1/x)*x == 1
+                else:
+                    assert_raises(ZeroDivisionError, y.__div__, x)
+                    assert_raises(ZeroDivisionError, x.__rdiv__, 1)
+            finally:
+                field.disable_tables()
+
+def test_interning():
+    f = FiniteField
+    f.base = 37
+    x = f(5)
+    assert not hasattr(x, "__dict__")
+
+    f.enable_interning()
+    try:
+        assert f(3) is f(40)
+        assert f(3) + f(4) is f(7)
+        assert f(3) * 5 is f(15)
+        assert -f(3) is f(34)
+        assert f(1)/f(2) is f(19)
+        assert f(2) - 3 is f(-1)
+        assert f(5) == x
+        assert f(5, 7) is not f(5)
+        assert f(5, 7) == 5
+
+        for _ in range(100):
+            y, z = f.random(), f.random()
+            assert y + z is f(y.value + z.value)
+            assert y * z is f(y.value * z.value)
+    finally:
+        f.disable_interning()
+    assert f(3) is not f(3)
+
+def test_pickle():
+    f = FiniteField
+    f.base = 37
+    x = f(5, 7)
+    for copy_ in [copy.copy, copy.deepcopy] + \
+            [lambda y, p=p: pickle.loads(pickle.dumps(y, p)) for p in range(3)]:
+        y = copy_(x)
+        assert y == x and y._base == 7
+
+    f.enable_interning()
+    try:
+        assert pickle.loads(pickle.dumps(f(3), 2)) is f(3)
+        assert copy.deepcopy(f(3)) is f(3)
+    finally:
+        f.disable_interning()
+
+def test_field_array():
+    for base in [2, 3, 7, 37, 101, 65537, 2**31 - 1]:
+        FiniteField.base = FieldArray.base = base
+        xs = [FiniteField.random() for _ in range(50)] + [FiniteField(0)]
+        ys = [FiniteField.random() for _ in range(50)] + [FiniteField(1)]
+        X, Y = FieldArray(xs), FieldArray(ys)
+        assert len(X) == 51
+        assert X[3] == xs[3]
+        assert (X[:3] == FieldArray(xs[:3])).all()
+
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            assert (X + Y)[i] == x + y
+            assert (X - Y)[i] == x - y
+            assert (X * Y)[i] == x * y
+            assert (-X)[i] == -x
+            assert (X + 5)[i] == x + 5
+            assert (5 - X)[i] == 5 - x
+            assert (y * X)[i] == y * x
+            assert (x + Y)[i] == x + y
+            assert (x - Y)[i] == x - y
+            if y != 0:
+                assert (X / y)[i] == x / y
+            assert X.is_square()[i] == x.is_square()
+
+        assert (X == xs[0])[0]
+        assert not (X != X).any()
+        assert_raises(TypeError, X.__add__, None)
+        assert_raises(TypeError, X.__eq__, 1.0)
+        assert_raises(TypeError, X.__add__, FiniteField(1, 5 if base != 5 else 7))
+
+        nonzero = FieldArray([x for x in xs if x != 0] or [1])
+        assert (nonzero * nonzero.inverse() == 1).all()
+        assert (Y / nonzero[:1] * nonzero[:1] == Y).all()
+        assert ((1 / nonzero) * nonzero == 1).all()
+        assert_raises(ZeroDivisionError, X.inverse)
+        assert_raises(ZeroDivisionError, Y.__div__, X)
+
+        squares = X * X
+        roots = squares.sqrt()
+        assert (roots * roots == squares).all()
+        for x in range(2, min(base, 100)):
+            if not FiniteField(x).is_square():
+                assert_raises(ValueError, FieldArray([1, x]).sqrt)
+                break
+
+        a, b, c = X.reduce([Y, 0])
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            x1, y1 = x.reduce([y])
+            assert a[i] == x1 and b[i] == y1 and c[i] == 0
+
+    assert_raises(ValueError, FieldArray, [1, 2], 2**31 + 11)
+    assert_raises(TypeError, FieldArray, [1.5, 2])
+
+def test_batch_sqrt():
+    # 65537 - 1 = 2^16, so each root takes many Shanks-Tonelli passes.
+    for base in [13, 17, 257, 7681, 65537]:
+        X = FieldArray(range(base), base)
+        squares = X * X
+        roots = squares.sqrt()
+        assert (roots * roots == squares).all()
+        assert squares.is_square().all()
+        assert X.is_square().sum() == (base + 1)/2
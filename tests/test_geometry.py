@@ -0,0 +1,114 @@
+import copy
+import os
+import pickle
+import subprocess
+import sys
+
+from nose.tools import assert_raises
+
+from pygeom.core import Point, Line, Conic
+from pygeom.pairs import LineSegment
+from pygeom.field import FiniteField, Rational
+from pygeom.geometry import blue, red, green, Geometry
+from pygeom.util import GeometryError
+
+def test_interning():
+    f = FiniteField
+    geom = Geometry(f(1), f(0), f(1))
+    assert geom is Geometry(f(1), f(0), f(1))
+    assert geom is blue(f)
+    assert red(f) is not blue(f)
+    assert green(Rational) is Geometry(Rational(0), Rational(2, 2), Rational(0))
+
+    old_base = f.base
+    try:
+        f.base = 7
+        geom7 = blue(f)
+        f.base = 11
+        geom11 = blue(f)
+        assert geom7 is not geom11
+        assert geom7.form[0]._base == 7
+        assert geom11.form[0]._base == 11
+        f.base = 7
+        assert blue(f) is geom7
+    finally:
+        f.base = old_base
+
+    assert_raises(ValueError, Geometry, f(1), f(1), f(1))
+
+def test_check_geometry():
+    f = Rational
+    p1 = Point(f(1), f(2), blue(f))
+    p2 = Point(f(3), f(4), blue(f))
+    p3 = Point(f(3), f(4), red(f))
+    assert LineSegment(p1, p2).quadrance() == 8
+    assert_raises(GeometryError, LineSegment, p1, p3)
+
+def test_hash():
+    assert hash(FiniteField(3, 7)) == hash(FiniteField(10, 7))
+    assert hash(Rational(2, 4)) == hash(Rational(-1, -2))
+    assert hash(Rational(4, 2)) == hash(2)
+
+def test_invariants():
+    f = Rational
+    for geom in [blue(f), red(f), green(f), Geometry(f(2), f(1, 3), f(-1))]:
+        a, b, c = geom.form
+        det = a*c - b*b
+        assert geom.det() == geom.determinant == det
+        assert geom.adjugate == (c, -b, a)
+        ia, ib, ic = geom.inverse
+        assert (a*ia + b*ib, a*ib + b*ic, b*ib + c*ic) == (1, 0, 1)
+
+        x, y = f(3, 2), f(-5)
+        assert geom.apply(x, y) == (a*x + b*y, b*x + c*y)
+
+        # Lines perpendicular to x + 2y + 1 = 0 have a direction orthogonal to
+        # its direction (-2, 1).
+        px, py = geom.perpendicular(f(1), f(2))
+        assert (c - 2*b, 2*a - b) == (px, py)
+        assert geom.dot(Point(f(-2), f(1), geom), Point(px, py, geom)) == 0
+
+def test_pickle():
+    FiniteField.base = 7
+    for f in [Rational, FiniteField]:
+        for geom in [blue(f), red(f), green(f), Geometry(f(2), f(1), f(-1))]:
+            objects = [geom, Point(f(1), f(2), geom),
+                       Line(f(2), f(4), f(6), geom),
+                       Conic(f(1), f(0), f(1), f(0), f(0), f(-1), geom),
+                       LineSegment(Point(f(1), f(2), geom),
+                                   Point(f(0), f(3), geom))]
+            for copy_ in [copy.copy, copy.deepcopy] + \
+                    [lambda x, p=p: pickle.loads(pickle.dumps(x, p))
+                     for p in range(3)]:
+                copies = [copy_(x) for x in objects]
+                assert copies[0] is geom
+                assert copies == objects
+                assert copies[1].geometry is geom
+            # The specialised arithmetic is not stored as bound methods
+            pickle.dumps(geom.__dict__, 2)
+            # Nor are cached hashes, which depend on the process
+            for x in objects[1:4]:
+                hash(x)
+                x.canonical_form()
+                state = pickle.loads(pickle.dumps(x, 2)).__dict__
+                assert "_hash" not in state and "_canonical" not in state
+
+def test_pickle_process():
+    code = ("import pickle, sys\n"
+            "from pygeom.core import Point, Line\n"
+            "from pygeom.field import Rational as f\n"
+            "from pygeom.geometry import red\n"
+            "p = Point(f(1, 2), f(3), red(f))\n"
+            "l = Line(f(2), f(4), f(6), red(f))\n"
+            "hash(p), hash(l)\n"
+            "sys.stdout.write(pickle.dumps([p, l], 2))\n")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    data = subprocess.Popen([sys.executable, "-c", code], env=env,
+                            stdout=subprocess.PIPE).communicate()[0]
+    p, l = pickle.loads(data)
+    f = Rational
+    q = Point(f(1, 2), f(3), red(f))
+    m = Line(f(1), f(2), f(3), red(f))
+    assert hash(p) == hash(q) and q in set([p])
+    assert hash(l) == hash(m) and m in set([l])
@@ -0,0 +1,60 @@
+from nose.tools import assert_raises
+
+from pygeom import kernels
+from pygeom.core import PointSet
+from pygeom.pairs import LineSegment, Vertex
+from pygeom.field import FiniteField
+from pygeom.util import NullLineError
+from util import generate_fuzz_data
+
+def test_fuzz_scalar():
+    N = 10
+    for data in generate_fuzz_data(N, points=1, lines=1):
+        point, line = data.points[0], data.lines[0]
+        if line.null():
+            assert_raises(NullLineError, kernels.foot, point, line)
+            assert_raises(NullLineError, kernels.quadrance, point, line)
+            continue
+        foot = kernels.foot(point, line)
+        altitude = kernels.altitude(point, line)
+        assert line.eval(*foot.form()) == 0
+        assert altitude.eval(*foot.form()) == 0
+        assert altitude.eval(*point.form()) == 0
+        assert Vertex(line, altitude).spread() == 1
+        assert kernels.quadrance(point, line) == \
+            LineSegment(point, foot).quadrance()
+        assert kernels.reflection(point, line) == foot - (point - foot)
+
+def test_fuzz_batch():
+    N = 10
+    for data in generate_fuzz_data(N, points=4, lines=1):
+        if data.field is not FiniteField:
+            continue
+        points, line = data.points, data.lines[0]
+        point_set = PointSet.from_points(points)
+        if line.null():
+            assert_raises(NullLineError, kernels.reflection, point_set, line)
+            continue
+        feet = kernels.foot(point_set, line)
+        reflections = kernels.reflection(point_set, line)
+        altitudes = kernels.altitude(point_set, line)
+        quadrances = kernels.quadrance(point_set, line)
+        for i, point in enumerate(points):
+            assert feet[i] == kernels.foot(point, line)
+            assert reflections[i] == kernels.reflection(point, line)
+            assert altitudes[i] == kernels.altitude(point, line)
+            assert quadrances[i] == kernels.quadrance(point, line)
+
+def test_midpoint():
+    f = FiniteField
+    f.base = 7
+    for data in generate_fuzz_data(1, points=2):
+        p1, p2 = data.points
+        geom = p1.geometry
+        if LineSegment(p1, p2).line.null():
+            assert_raises(ValueError, kernels.midpoint, p1, p2)
+        else:
+            m = kernels.midpoint(p1, p2)
+            assert LineSegment(m, p1).quadrance() == \
+                LineSegment(m, p2).quadrance()
+        assert_raises(ValueError, kernels.midpoint, p1, p1)
@@ -4,7 +4,9 @@ from pygeom.core import Point, Line
 from pygeom.pairs import LineSegment, Vertex, PointLine
 from pygeom.field import FiniteField, Rational
 from pygeom.geometry import blue, red, green, Geometry
-from pygeom.util import GeometryError, NullLineError
+from pygeom.util import GeometryError, NullLineError, verification, VERIFY_OFF, \
+    enable_memoization, disable_memoization, memoization_stats, \
+    DEFAULT_CACHE_SIZE
 from util import random_point, random_line, random_geometry, random_pointline, generate_fuzz_data
 
 def test_fuzz_init():
@@ -23,8 +25,10 @@ def test_fuzz_init():
         assert v0 == v1
 
         if g0 != g1:
-            l0.geometry = p0.geometry = g0
-            l1.geometry = p1.geometry = g1
+            l0 = Line(l0.a, l0.b, l0.c, g0)
+            l1 = Line(l1.a, l1.b, l1.c, g1)
+            p0 = Point(p0.x, p0.y, g0)
+            p1 = Point(p1.x, p1.y, g1)
             assert_raises(GeometryError, Vertex, l0, l1)
             assert_raises(GeometryError, PointLine, p0, l1)
             assert_raises(GeometryError, LineSegment, p0, p1)
@@ -43,6 +47,66 @@ def test_fuzz_altitude():
             assert Vertex(alt.line, pl.line).perpendicular()
             assert PointLine(alt.point, pl.line).on()
 
+def test_fuzz_unverified():
+    N = 20
+    for data in generate_fuzz_data(N, pointlines=1):
+        pl = data.pointlines[0]
+        if pl.line.null():
+            continue
+        alt = pl.altitude()
+        with verification(VERIFY_OFF):
+            assert pl.altitude() == alt
+
+def test_memoization():
+    f = Rational
+    geom = blue(f)
+    pl = PointLine(Point(f(1), f(2), geom), Line(f(3), f(4), f(5), geom))
+    same = PointLine(Point(f(1), f(2), geom), Line(f(6), f(8), f(10), geom))
+    altitude = pl.altitude()
+
+    enable_memoization("PointLine.altitude", size=2)
+    try:
+        assert pl.altitude() == altitude
+        assert same.altitude() is pl.altitude()
+        # These use the closed forms rather than the altitude
+        pl.reflection()
+        pl.quadrance()
+        stats = memoization_stats("PointLine.altitude")["PointLine.altitude"]
+        assert stats["misses"] == 1 and stats["hits"] == 2
+        assert stats["entries"] == 1
+
+        for c in range(3):
+            PointLine(pl.point, Line(f(1), f(1), f(c), geom)).altitude()
+        stats = memoization_stats()["PointLine.altitude"]
+        assert stats["evictions"] == 2 and stats["entries"] == 2
+    finally:
+        disable_memoization()
+        stats = memoization_stats("PointLine.altitude")["PointLine.altitude"]
+        enable_memoization("PointLine.altitude", size=DEFAULT_CACHE_SIZE)
+        disable_memoization()
+    assert stats == \
+        {"hits": 0, "misses": 0, "evictions": 0, "entries": 0, "size": 2}
+    assert memoization_stats("PointLine.altitude")["PointLine.altitude"] == \
+        {"hits": 0, "misses": 0, "evictions": 0, "entries": 0,
+         "size": DEFAULT_CACHE_SIZE}
+    assert_raises(ValueError, enable_memoization, "PointLine.unknown")
+
+def test_memoization_ints():
+    f = FiniteField
+    f.base = 7
+    geom = blue(f)
+    pl = PointLine(Point(f(1), f(2), geom), Line(f(0), f(1), f(0), geom))
+
+    # Field elements and the ints they equal share a cache entry
+    enable_memoization("PointLine.construct_spread")
+    try:
+        v = pl.construct_spread(1)
+        assert pl.construct_spread(f(1)) is v
+        stats = memoization_stats("PointLine.construct_spread")
+        assert stats["PointLine.construct_spread"]["hits"] == 1
+    finally:
+        disable_memoization()
+
 def test_fuzz_reflection():
     N = 20
     for data in generate_fuzz_data(N, pointlines=1):
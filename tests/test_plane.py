@@ -0,0 +1,92 @@
+from nose.tools import assert_raises
+
+from pygeom.core import Line, PointSet
+from pygeom.pairs import LineSegment, Vertex
+from pygeom.field import FiniteField
+from pygeom.geometry import blue
+from pygeom.plane import FinitePlane, IncidenceMatrix
+
+def test_ids():
+    f = FiniteField
+    f.base = 7
+    plane = FinitePlane(f, blue(f))
+    assert plane.num_points == 49 and plane.num_lines == 56
+    for i in range(plane.num_points):
+        assert plane.point_id(plane.point(i)) == i
+    for j in range(plane.num_lines):
+        assert plane.line_id(plane.line(j)) == j
+    assert plane.line_id(Line(f(3), f(6), f(1), blue(f))) == \
+        plane.line_id(Line(f(1), f(2), f(5), blue(f)))
+    assert_raises(ValueError, plane.line_id, Line(f(0), f(0), f(1)))
+
+def test_incidence():
+    f = FiniteField
+    for base in [2, 3, 7, 13]:
+        f.base = base
+        plane = FinitePlane(f, blue(f))
+        p = base
+        for j in range(plane.num_lines):
+            line = plane.line(j)
+            points = plane.points_on(j)
+            assert len(points) == len(set(points)) == p
+            expected = [i for i in range(plane.num_points)
+                        if line.eval(*plane.point(i).form()) == 0]
+            assert sorted(points) == expected
+            assert [plane.on(i, j) for i in range(plane.num_points)] == \
+                [i in expected for i in range(plane.num_points)]
+
+        for i in range(plane.num_points):
+            lines = plane.lines_through(i)
+            assert len(set(lines)) == p + 1
+            for j in lines:
+                assert plane.on(i, j)
+
+def test_join_meet():
+    f = FiniteField
+    f.base = 11
+    plane = FinitePlane(f, blue(f))
+    for i1 in range(0, plane.num_points, 5):
+        for i2 in range(0, plane.num_points, 7):
+            if i1 == i2:
+                assert_raises(ValueError, plane.join, i1, i2)
+                continue
+            j = plane.join(i1, i2)
+            assert plane.line(j) == \
+                LineSegment(plane.point(i1), plane.point(i2)).line
+    for j1 in range(0, plane.num_lines, 3):
+        for j2 in range(0, plane.num_lines, 5):
+            if j1 == j2:
+                assert_raises(ValueError, plane.meet, j1, j2)
+                continue
+            vertex = Vertex(plane.line(j1), plane.line(j2))
+            i = plane.meet(j1, j2)
+            if vertex.point is None:
+                assert i is None
+            else:
+                assert plane.point(i) == vertex.point
+
+def test_incidence_matrix():
+    f = FiniteField
+    f.base = 7
+    geom = blue(f)
+    plane = FinitePlane(f, geom)
+    matrix = IncidenceMatrix.from_plane(plane)
+    lines = [plane.line(j) for j in range(plane.num_lines)]
+    assert (IncidenceMatrix(lines, f).rows == matrix.rows).all()
+    assert len(matrix) == plane.num_lines
+
+    points = [plane.point(i) for i in [0, 8, 16, 3, 40, 41]]
+    counts = matrix.count(points)
+    for j, line in enumerate(lines):
+        assert counts[j] == len([point for point in points
+                                 if line.eval(point.x, point.y) == 0])
+    assert (matrix.count(PointSet.from_points(points)) == counts).all()
+    assert (matrix.count([0, 8, 16, 3, 40, 41]) == counts).all()
+
+    # [0, 0], [1, 1], [2, 2] and [5, 5] lie on x - y = 0
+    assert list(matrix.at_least(points, 3)) == \
+        [plane.line_id(Line(f(1), f(-1), f(0), geom))]
+    for k in range(5):
+        assert list(matrix.at_least(points, k)) == \
+            [j for j in range(len(lines)) if counts[j] >= k]
+    assert (matrix.count(range(49)) == 7).all()
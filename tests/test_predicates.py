@@ -0,0 +1,114 @@
+from fractions import Fraction
+from nose.tools import assert_raises
+
+from pygeom import predicates
+from pygeom.core import Line, PointSet, LineSet
+from pygeom.pairs import LineSegment, Vertex
+from pygeom.field import FiniteField, Rational, rational_backend
+from pygeom.geometry import blue
+from pygeom.predicates import Interval
+from pygeom.util import NullLineError
+from util import generate_fuzz_data
+
+def test_fuzz_lines():
+    N = 10
+    for data in generate_fuzz_data(N, lines=3):
+        l1, l2, l3 = data.lines
+        vertex = Vertex(l1, l2)
+        assert predicates.parallel(l1, l2) == (vertex.point is None)
+        try:
+            assert predicates.perpendicular(l1, l2) == (vertex.spread() == 1)
+        except (NullLineError, ZeroDivisionError):
+            pass
+        if vertex.point is not None:
+            assert predicates.concurrent(l1, l2, l3) == \
+                predicates.on(vertex.point, l3)
+        assert predicates.concurrent(l1, l2, l1)
+
+def test_fuzz_points():
+    N = 10
+    for data in generate_fuzz_data(N, points=3, conics=1):
+        p1, p2, p3 = data.points
+        conic = data.conics[0]
+        if p1 != p2:
+            line = LineSegment(p1, p2).line
+            assert predicates.collinear(p1, p2, p3) == predicates.on(p3, line)
+            assert predicates.on(p1, line) and predicates.on(p2, line)
+        assert predicates.collinear(p1, p2, p2)
+        assert predicates.through(conic, p1) == (conic.eval(*p1.form()) == 0)
+        try:
+            point = conic._point_on()
+        except (ValueError, ZeroDivisionError, AttributeError):
+            continue
+        if predicates.through(conic, point):
+            assert predicates.tangent(conic, conic.tangent(point))
+
+def test_fuzz_vectorized():
+    N = 5
+    for data in generate_fuzz_data(N, points=4, lines=4):
+        if data.field is not FiniteField:
+            continue
+        points = PointSet.from_points(data.points)
+        lines = LineSet.from_lines(data.lines)
+        line = data.lines[0]
+        assert list(predicates.on(points, line)) == \
+            [predicates.on(point, line) for point in data.points]
+        assert list(predicates.parallel(lines, line)) == \
+            [predicates.parallel(l, line) for l in data.lines]
+        assert list(predicates.perpendicular(lines, line)) == \
+            [predicates.perpendicular(l, line) for l in data.lines]
+        assert list(predicates.concurrent(lines, line, data.lines[1])) == \
+            [predicates.concurrent(l, line, data.lines[1]) for l in data.lines]
+        p1, p2 = data.points[:2]
+        assert list(predicates.collinear(points, p1, p2)) == \
+            [predicates.collinear(p, p1, p2) for p in data.points]
+
+def outcomes(data):
+    l1, l2, l3 = data.lines
+    p1, p2, p3 = data.points
+    conic = data.conics[0]
+    return [predicates.parallel(l1, l2), predicates.perpendicular(l1, l2),
+            predicates.on(p1, l1), predicates.through(conic, p1),
+            predicates.tangent(conic, l1), predicates.collinear(p1, p2, p3),
+            predicates.concurrent(l1, l2, l3),
+            predicates.on(p1, LineSegment(p1, p2).line)]
+
+def test_fuzz_filter():
+    N = 20
+    predicates.reset_predicate_stats()
+    for data in generate_fuzz_data(N, lines=3, points=3, conics=1):
+        if data.field is not Rational:
+            continue
+        expected = outcomes(data)
+        predicates.disable_filtering()
+        try:
+            assert outcomes(data) == expected
+        finally:
+            predicates.enable_filtering()
+    stats = predicates.predicate_stats()
+    assert stats["filtered"] > 0 and stats["exact"] > 0
+    predicates.reset_predicate_stats()
+    assert predicates.predicate_stats() == {"filtered": 0, "exact": 0}
+
+def test_interval():
+    for cls in [Rational, rational_backend("fraction")]:
+        for num, den in [(1, 3), (-2, 7), (10**200 + 1, 3**300), (0, 1)]:
+            interval = Interval.from_rational(cls(num, den))
+            assert Fraction(interval.lo) <= Fraction(num, den) <= \
+                Fraction(interval.hi)
+        assert_raises(OverflowError, Interval.from_rational, cls(10**400))
+
+    # Unreduced arithmetic can leave an int numerator over a long denominator
+    for num, den in [(3, 7L), (3L, 7), (-1, 10L**40)]:
+        interval = Interval.from_rational(Rational._new(num, den))
+        assert Fraction(interval.lo) <= Fraction(num, den) <= \
+            Fraction(interval.hi)
+
+    # Nearly parallel lines with large coefficients are decided exactly
+    f = Rational
+    k = 10**30
+    l1 = Line(f(k), f(k + 1), f(0), blue(f))
+    l2 = Line(f(k + 1), f(k + 2), f(1), blue(f))
+    l3 = Line(f(2*k), f(2*k + 2), f(5), blue(f))
+    assert not predicates.parallel(l1, l2)
+    assert predicates.parallel(l1, l3)
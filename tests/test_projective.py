@@ -0,0 +1,70 @@
+from nose.tools import assert_raises
+
+from pygeom.core import Point
+from pygeom.pairs import LineSegment, Vertex
+from pygeom.projective import ProjectivePoint, ProjectiveLine
+from pygeom.field import Rational
+from pygeom.geometry import blue, red
+from pygeom.util import NullLineError
+from util import generate_fuzz_data
+
+def test_init():
+    f = Rational
+    p = ProjectivePoint(f(2), f(4), f(2), blue(f))
+    assert p == ProjectivePoint(f(-1), f(-2), f(-1), blue(f))
+    assert hash(p) == hash(ProjectivePoint(f(1), f(2), f(1), blue(f)))
+    assert p.affine() == Point(f(1), f(2), blue(f))
+    assert p.affine().projective() == p
+    assert_raises(ValueError, ProjectivePoint, f(0), f(0), f(0))
+
+    infinity = ProjectivePoint(f(1), f(1), f(0), blue(f))
+    assert infinity.at_infinity()
+    assert_raises(ValueError, infinity.affine)
+
+    # In red geometry x - y = 0 is null and x = 0 is not
+    l1 = ProjectiveLine(f(1), f(-1), f(0), red(f))
+    l2 = ProjectiveLine(f(1), f(0), f(0), red(f))
+    assert_raises(ZeroDivisionError, Vertex(l1.affine(), l2.affine()).spread)
+    assert_raises(ZeroDivisionError, l1.spread, l2)
+    assert_raises(NullLineError, l1.spread, l1)
+
+    assert ProjectiveLine(f(0), f(0), f(3)).at_infinity()
+    assert_raises(ValueError, ProjectiveLine(f(0), f(0), f(3)).affine)
+
+def test_fuzz_meet():
+    N = 10
+    for data in generate_fuzz_data(N, lines=2):
+        l1, l2 = data.lines
+        if l1.a == l1.b == 0 or l2.a == l2.b == 0 or l1 == l2:
+            continue
+        p1, p2 = l1.projective(), l2.projective()
+        point = p1.meet(p2)
+        assert p1.through(point) and point.on(p2)
+        vertex = Vertex(l1, l2)
+        if vertex.parallel():
+            assert point.at_infinity()
+            assert p1.parallel(p2)
+        else:
+            assert point.affine() == vertex.point
+            try:
+                assert p1.spread(p2) == vertex.spread()
+            except (NullLineError, ZeroDivisionError), e:
+                assert_raises(e.__class__, p1.spread, p2)
+
+def test_fuzz_join():
+    N = 10
+    for data in generate_fuzz_data(N, points=2):
+        q1, q2 = data.points
+        if q1 == q2:
+            continue
+        p1, p2 = q1.projective(), q2.projective()
+        line = p1.join(p2)
+        assert line.affine() == LineSegment(q1, q2).line
+        assert p1.quadrance(p2) == LineSegment(q1, q2).quadrance()
+
+        # Scaling the coordinates doesn't change the results
+        k = data.field(2)
+        p3 = ProjectivePoint(k*p2.x, k*p2.y, k*p2.z, p2.geometry)
+        assert p3 == p2
+        assert p1.join(p3) == line
+        assert p1.quadrance(p3) == p1.quadrance(p2)
@@ -1,7 +1,14 @@
+import copy
+import pickle
+
 from nose.tools import assert_raises
 
-from pygeom.field import Rational
+from pygeom.field import Rational, FractionRational, MPQRational, \
+    rational_backend
 from pygeom.core import Point
+from pygeom.util import gcd
+from pygeom.geometry import blue
+from util import rational_fields, random_pointline
 
 def test_init_from_int():
     r1 = Rational(1)
@@ -191,3 +198,93 @@ def test_eq():
     assert_raises(TypeError, r1.__eq__, 5.0)
     assert_raises(TypeError, r1.__eq__, "fail")
     assert_raises(TypeError, r1.__eq__, None)
+
+def test_lowest_terms():
+    for _ in range(500):
+        r1, r2 = Rational.random(), Rational.random()
+        results = [r1 + r2, r1 - r2, r1 * r2, -r1, r1 + 3, 3 - r1, r1 * -4]
+        if r2 != 0:
+            results += [r1 / r2, r1 / -3, -5 / r2]
+        for r in results:
+            assert r.den > 0
+            assert gcd(r.num, r.den) == 1
+
+def test_defer_reduce():
+    Rational.defer_reduce = True
+    try:
+        r1 = Rational(1, 2) + Rational(1, 6)
+        assert r1 == Rational(2, 3)
+        assert r1 == Rational(4, 6)
+        assert str(r1) == "2/3"
+        assert r1 * 3 == 2
+        assert (r1 * 6).sqrt() == 2
+        assert Rational(-5, 3) / -r1 == Rational(5, 2)
+
+        for _ in range(200):
+            x, y, z = Rational.random(), Rational.random(), Rational.random()
+            Rational.defer_reduce = False
+            expected = [(x + y)*z, (x - y)*z, x*y - z]
+            Rational.defer_reduce = True
+            assert [(x + y)*z, (x - y)*z, x*y - z] == expected
+            a, b, c = (x + y).reduce([y*z, z - x])
+            assert [a.den, b.den, c.den] == [1, 1, 1]
+            assert a*(y*z) == b*(x + y)
+    finally:
+        Rational.defer_reduce = False
+
+def test_pickle():
+    for r in [Rational(3, -4), Rational(10**30, 7), Rational._new(2, 4)]:
+        for p in range(3):
+            assert pickle.loads(pickle.dumps(r, p)) == r
+        assert copy.deepcopy(r) == r
+
+    for field in rational_fields():
+        r = field(3, -4)
+        for p in range(3):
+            assert pickle.loads(pickle.dumps(r, p)) == r
+        assert copy.deepcopy(r) == r
+
+def test_backends():
+    assert rational_backend("python") is Rational
+    assert rational_backend("fraction") is FractionRational
+    assert rational_backend() in rational_fields()
+    if MPQRational._type is None:
+        assert_raises(ImportError, rational_backend, "gmpy2")
+        assert_raises(ImportError, MPQRational, 1)
+
+    for field in rational_fields():
+        assert_raises(ValueError, field, 1, 0)
+        assert_raises(TypeError, field, "fail", 1)
+        assert_raises(TypeError, field, 1, None)
+        assert_raises(TypeError, field(1).__add__, 5.5)
+        assert_raises(TypeError, field(1).__eq__, None)
+        assert_raises(ZeroDivisionError, field(1).__div__, 0)
+        assert_raises(ZeroDivisionError, field(0).__rdiv__, 1)
+
+        r = field(10, -4)
+        assert (r.num, r.den) == (-5, 2)
+        assert str(r) == "-5/2"
+        assert r == Rational(-5, 2).num*field(1, 2)
+        assert (r*r).sqrt() == -r
+        assert_raises(ValueError, r.sqrt)
+
+        for _ in range(100):
+            x, y = Rational.random(), Rational.random()
+            x1, y1 = field(x.num, x.den), field(y.num, y.den)
+            results = [x + y, x - y, x*y, -x, 2 - x, x*3]
+            if y != 0:
+                results += [x/y, 5/y]
+            results1 = [x1 + y1, x1 - y1, x1*y1, -x1, 2 - x1, x1*3]
+            if y1 != 0:
+                results1 += [x1/y1, 5/y1]
+            for r, r1 in zip(results, results1):
+                assert type(r1) == field
+                assert (r.num, r.den) == (r1.num, r1.den)
+            assert [(a.num, a.den) for a in x.reduce([y, x*y])] == \
+                [(a.num, a.den) for a in x1.reduce([y1, x1*y1])]
+
+        geom = blue(field)
+        for _ in range(20):
+            pl = random_pointline(field, geom)
+            if not pl.line.null():
+                assert pl.reflection().reflection() == pl
@@ -0,0 +1,88 @@
+from nose.tools import assert_raises
+
+from pygeom.core import Point, Line
+from pygeom.pairs import LineSegment, Vertex
+from pygeom.field import FiniteField
+from pygeom.geometry import blue
+from pygeom.singer import SingerPlane, primitive_cubic
+
+def test_difference_set():
+    f = FiniteField
+    for base in [2, 3, 5, 7, 11]:
+        f.base = base
+        plane = SingerPlane(f)
+        N = base*base + base + 1
+        D = list(plane.difference_set)
+        assert len(D) == base + 1
+        differences = sorted([(a - b) % N for a in D for b in D if a != b])
+        assert differences == range(1, N)
+
+def test_incidence():
+    f = FiniteField
+    for base in [2, 3, 7]:
+        f.base = base
+        plane = SingerPlane(f)
+        N = plane.order
+        vectors = [plane.vector(i) for i in range(N)]
+        for j in range(N):
+            a, b, c = plane.line_vector(j)
+            on = [i for i in range(N) if plane.on(i, j)]
+            assert on == sorted(plane.points_on(j))
+            assert on == [i for i, (x, y, z) in enumerate(vectors)
+                          if (a*x + b*y + c*z) % base == 0]
+            for i in on:
+                assert j in plane.lines_through(i)
+
+        for i1 in range(N):
+            for i2 in range(N):
+                if i1 == i2:
+                    assert_raises(ValueError, plane.join, i1, i2)
+                    assert_raises(ValueError, plane.meet, i1, i2)
+                    continue
+                j = plane.join(i1, i2)
+                assert plane.on(i1, j) and plane.on(i2, j)
+                i = plane.meet(i1, i2)
+                assert plane.on(i, i1) and plane.on(i, i2)
+
+def test_affine():
+    f = FiniteField
+    f.base = 13
+    geom = blue(f)
+    plane = SingerPlane(f, geom)
+    assert plane.polynomial == primitive_cubic(13)
+    finite = 0
+    for i in range(plane.order):
+        assert plane.index(plane.vector(i)) == i
+        try:
+            point = plane.point(i)
+        except ValueError:
+            assert plane.vector(i)[2] == 0
+            continue
+        finite += 1
+        assert plane.point_index(point) == i
+    assert finite == 13*13
+
+    at_infinity = 0
+    for j in range(plane.order):
+        try:
+            line = plane.line(j)
+        except ValueError:
+            at_infinity += 1
+            continue
+        assert plane.line_index(line) == j
+        points = [plane.point(i) for i in plane.points_on(j)
+                  if plane.vector(i)[2] != 0]
+        assert len(points) == 13
+        assert LineSegment(points[0], points[1]).line == line
+    assert at_infinity == 1
+
+    p1 = Point(f(3), f(4), geom)
+    p2 = Point(f(5), f(1), geom)
+    j = plane.join(plane.point_index(p1), plane.point_index(p2))
+    assert plane.line(j) == LineSegment(p1, p2).line
+
+    l1 = Line(f(1), f(2), f(3), geom)
+    l2 = Line(f(2), f(4), f(5), geom)
+    i = plane.meet(plane.line_index(l1), plane.line_index(l2))
+    assert Vertex(l1, l2).point is None
+    assert_raises(ValueError, plane.point, i)
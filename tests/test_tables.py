@@ -0,0 +1,84 @@
+from pygeom.core import Point
+from pygeom.field import FiniteField
+from pygeom.geometry import blue
+from pygeom.tables import SpreadTable, QuadranceTable, \
+    enable_spread_tables, disable_spread_tables, enable_quadrance_tables, \
+    disable_quadrance_tables, SPREAD_TABLE_LIMIT
+from pygeom.util import NullLineError
+from util import generate_fuzz_data
+
+def outcome(func, *args):
+    """
+    Return the result of a call, or the type of the exception it raised.
+    """
+    try:
+        return func(*args)
+    except (ValueError, ZeroDivisionError, NullLineError), e:
+        return e.__class__
+
+def test_get():
+    f = FiniteField
+    f.base = 7
+    assert SpreadTable.get(blue(f)) is None
+    enable_spread_tables()
+    try:
+        table = SpreadTable.get(blue(f))
+        assert table is SpreadTable.get(blue(f))
+        assert table.spreads.shape == (8, 8)
+        f.base = SPREAD_TABLE_LIMIT + 1
+        assert SpreadTable.get(blue(f)) is None
+    finally:
+        f.base = 7
+        disable_spread_tables()
+    assert SpreadTable.get(blue(f)) is None
+
+def test_fuzz_spread():
+    N = 10
+    for data in generate_fuzz_data(N, vertices=1, pointlines=1, spreads=1):
+        vertex = data.vertices[0]
+        pl = data.pointlines[0]
+        spread = data.spreads[0]
+        expected = [outcome(vertex.spread), outcome(vertex.perpendicular),
+                    outcome(pl.construct_spread, spread),
+                    outcome(pl.construct_spread, 1)]
+        enable_spread_tables()
+        try:
+            assert [outcome(vertex.spread), outcome(vertex.perpendicular),
+                    outcome(pl.construct_spread, spread),
+                    outcome(pl.construct_spread, 1)] == expected
+        finally:
+            disable_spread_tables()
+
+def test_circle():
+    f = FiniteField
+    f.base = 13
+    enable_quadrance_tables()
+    try:
+        table = QuadranceTable.get(blue(f))
+        assert table is QuadranceTable.get(blue(f))
+        assert SpreadTable.get(blue(f)) is None
+        assert sum([len(table.vectors(q)[0]) for q in range(13)]) == 13*13
+        for centre in [Point(f(0), f(0), blue(f)), Point(f(5), f(11), blue(f))]:
+            for q in [0, 1, 2, 7]:
+                xs, ys = centre.circle(f(q)).incidence_points(f)
+                circle = table.circle(centre, f(q))
+                assert sorted(zip(circle.x.value, circle.y.value)) == \
+                    zip(xs, ys)
+    finally:
+        f.base = 7
+        disable_quadrance_tables()
+    assert QuadranceTable.get(blue(f)) is None
+
+def test_fuzz_quadrance():
+    N = 10
+    for data in generate_fuzz_data(N, pointlines=1, spreads=1):
+        pl = data.pointlines[0]
+        quadrance = data.spreads[0]
+        expected = [outcome(pl.construct_quadrance, quadrance),
+                    outcome(pl.construct_quadrance, 0)]
+        enable_quadrance_tables()
+        try:
+            assert [outcome(pl.construct_quadrance, quadrance),
+                    outcome(pl.construct_quadrance, 0)] == expected
+        finally:
+            disable_quadrance_tables()
@@ -1,4 +1,9 @@
-from pygeom.util import shanks_tonelli, M, all_equal
+from nose.tools import assert_raises
+
+from pygeom.util import shanks_tonelli, M, all_equal, legendre, jacobi, \
+    is_quadratic_residue, quadratic_residues, cipolla, isqrt, is_square, \
+    exact_sqrt, verify, verification, get_verification, set_verification, \
+    VerificationError, VERIFY_OFF, VERIFY_SAMPLED, VERIFY_FULL, LRUCache
 
 def test_shanks():
     p = 37
@@ -7,6 +12,24 @@ def test_shanks():
         st = shanks_tonelli(n, p)
         assert st*st % p == n
 
+def test_square_roots():
+    # These include primes with large powers of two dividing p - 1, which
+    # take the Cipolla path through shanks_tonelli().
+    for p in [3, 5, 13, 17, 257, 7681, 65537, 998244353, 2**61 - 1]:
+        for x in [1, 2, 3, 12345, p - 1, 2**40 + 15]:
+            n = x*x % p
+            for sqrt in [shanks_tonelli, cipolla]:
+                root = sqrt(n, p)
+                assert root*root % p == n
+        assert shanks_tonelli(0, p) == cipolla(0, p) == 0
+
+    for p in [5, 13, 257, 65537, 2**61 - 1]:
+        n = 2
+        while legendre(n, p) == 1:
+            n += 1
+        assert_raises(ValueError, shanks_tonelli, n, p)
+        assert_raises(ValueError, cipolla, n, p)
+
 def test_M():
     a, b, c = M(10, 37)
     assert a == 100
@@ -19,3 +42,106 @@ def test_all_equal():
     assert all_equal([1, 1, 1])
     assert not all_equal([2, 1, 1, 1])
     assert not all_equal([1, 2])
+
+def test_legendre():
+    for p in [3, 5, 7, 37, 101]:
+        squares = set([x*x % p for x in range(1, p)])
+        for a in range(-p, 2*p):
+            if a % p == 0:
+                expected = 0
+            elif a % p in squares:
+                expected = 1
+            else:
+                expected = -1
+            assert legendre(a, p) == expected
+            assert jacobi(a, p) == expected
+            assert is_quadratic_residue(a, p) == (expected != -1)
+
+def test_jacobi():
+    # The Jacobi symbol is multiplicative in its denominator.
+    for a in range(-20, 20):
+        assert jacobi(a, 1) == 1
+        assert jacobi(a, 15) == jacobi(a, 3)*jacobi(a, 5)
+        assert jacobi(a, 63) == jacobi(a, 3)**2*jacobi(a, 7)
+
+def test_quadratic_residues():
+    p = 2**61 - 1
+    for a in [2, 3, 5, 7, 10**12 + 39, p - 1]:
+        assert is_quadratic_residue(a, p) == (pow(a, (p - 1)/2, p) == 1)
+        assert is_quadratic_residue(a*a, p)
+
+    bitmap = quadratic_residues(101)
+    assert quadratic_residues(101) is bitmap
+    for n in range(101):
+        assert bool(bitmap[n >> 3] & (1 << (n & 7))) == (legendre(n, 101) != -1)
+
+def test_isqrt():
+    numbers = range(2000) + [10**k + d for k in range(3, 60) for d in [-1, 0, 1]]
+    numbers += [(2**k + d)**2 + e for k in [30, 31, 32, 64, 100, 500]
+                for d in [-1, 0, 1] for e in [-1, 0, 1]]
+    for n in numbers:
+        root = isqrt(n)
+        assert root*root <= n < (root + 1)*(root + 1)
+        assert is_square(n) == (root*root == n)
+        assert exact_sqrt(n) == (root if root*root == n else None)
+    assert_raises(ValueError, isqrt, -1)
+    assert not is_square(-4)
+    assert exact_sqrt(-4) is None
+
+def test_verification():
+    assert get_verification() == (VERIFY_FULL, 1)
+    assert_raises(VerificationError, verify, lambda: False)
+    verify(lambda: True)
+
+    calls = []
+    def check():
+        calls.append(1)
+        return False
+
+    with verification(VERIFY_OFF):
+        assert get_verification() == (VERIFY_OFF, 1)
+        for _ in range(10):
+            verify(check)
+    assert calls == []
+    assert get_verification() == (VERIFY_FULL, 1)
+
+    def sampled():
+        calls.append(1)
+        return True
+    with verification(VERIFY_SAMPLED, 4):
+        for _ in range(20):
+            verify(sampled)
+    assert len(calls) == 5
+
+    assert_raises(ValueError, set_verification, "sometimes")
+    assert_raises(ValueError, set_verification, VERIFY_SAMPLED, 0)
+    assert_raises(ValueError, verification(VERIFY_SAMPLED, -1).__enter__)
+
+def test_verification_threads():
+    import threading
+    policies = []
+    def run():
+        policies.append(get_verification())
+    with verification(VERIFY_OFF):
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+    assert policies == [(VERIFY_FULL, 1)]
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert_raises(KeyError, cache.get, "b")
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+    assert cache.stats() == {"hits": 2, "misses": 1, "evictions": 1,
+                             "entries": 2, "size": 2}
+    cache.resize(1)
+    assert_raises(KeyError, cache.get, "a")
+    assert cache.evictions == 2
+    assert_raises(ValueError, cache.resize, 0)
+    cache.clear()
+    assert len(cache) == 0 and cache.hits == 0
@@ -1,7 +1,8 @@
 from pygeom.core import Point, Line, Conic
 from pygeom.pairs import Vertex, LineSegment, PointLine
 from pygeom.geometry import Geometry, blue, red, green
-from pygeom.field import Rational, FiniteField
+from pygeom.field import Rational, FiniteField, FractionRational, \
+    rational_backend
 
 def random_point(field, geometry):
     x, y = field.random(), field.random()
@@ -52,6 +53,14 @@ class FuzzData(object):
     def __repr__(self):
         return "".join(map(str, [self.field, self.geom, self.pointlines, self.spreads]))
 
+def rational_fields():
+    fields = [Rational, FractionRational]
+    try:
+        fields.append(rational_backend("gmpy2"))
+    except ImportError:
+        pass
+    return fields
+
 def random_finite_fields(N):
     yield Rational
     FiniteField.base = 37